@@ -1,17 +1,29 @@
 from scripts.db_connection import execute_query
-from scripts.read_bin import data_extraction
+from scripts.read_bin import data_extraction, iter_cycle_batches, load_cycle_batch, compact_day
 from scripts.feature_extraction import feature_extraction
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 import sys
 from scripts.logger import Logger
-import pandas as pd
-import json
+from scripts.metrics import Metrics
+from scripts.progress_store import ProgressStore
+from scripts.discovery import WorkItem, discover_work, DISCOVERY_MANIFEST
+from scripts.fingerprint import FingerprintStore, FINGERPRINT_DB, without_cycles, stat_files
+from scripts.watcher import CycleWatcher
+from scripts.prefetch import prefetch
+from scripts.feature_cache import get_feature_cache
+from scripts.pipeline import Pipeline
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 # Logger'ı başlat
 logger = Logger()
 
+# Metrikleri başlat
+metrics = Metrics()
+
 # .env dosyasını yükle
 load_dotenv('db.config')
 
@@ -24,82 +36,408 @@ if is_test:
     init_test_db()
     logger.info("Test veritabanı başlatıldı")
 else:
-    from scripts.db_functions import insert_new_features, format_data_with_id, insert_feature_values, get_station_profile
+    from scripts.db_functions import insert_new_features, format_data_with_id, insert_feature_values, insert_feature_values_concurrent, merge_feature_values, get_station_profile
+
+# Yazma modu: batch (SELECT + INSERT/UPDATE), merge (staging tablo + tek MERGE; bkz. tests/test_merge.py) veya async (batch'ler asenkron engine ile eşzamanlı)
+UPSERT_MODE = os.getenv('UPSERT_MODE', 'batch').lower()
+if UPSERT_MODE == "async" and not is_test:
+    # Eksik sürücü ilk yazmada değil başlangıçta bildirilir
+    from scripts.async_db import check_async_dependencies
+    check_async_dependencies()
+
+# batch/async yazma modlarında batch boyutu ('auto': ölçülen batch sürelerine göre uyarlamalı)
+BATCH_SIZE = os.getenv('BATCH_SIZE', 'auto').lower()
+BATCH_SIZE = None if BATCH_SIZE == 'auto' else int(BATCH_SIZE)
+
+# Değişmeyen station-günleri atla (girdi parmak izi + EXTRACTOR_VERSION)
+SKIP_UNCHANGED = os.getenv('SKIP_UNCHANGED', 'true').lower() == 'true'
+
+# Çalıştırma metrikleri: JSON-lines dosyası (boş: kapalı), Prometheus metin dosyası ve /metrics portu (0: kapalı)
+METRICS_FILE = os.getenv('METRICS_FILE', 'metrics.jsonl')
+METRICS_PROM_FILE = os.getenv('METRICS_PROM_FILE', '')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
 
-# Progress dosyası yönetimi
+# İsteğe bağlı yerel özellik önbelleği (FEATURE_CACHE_DIR + pyarrow)
+feature_cache = get_feature_cache()
+
+# Progress yönetimi: append-only log + bellekte küme (eski progress.json otomatik taşınır)
 PROGRESS_FILE = "progress.json"
+PROGRESS_LOG = "progress.log"
 
 def load_progress():
     """İşlem ilerlemesini yükler"""
     try:
-        if os.path.exists(PROGRESS_FILE):
-            with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                progress = json.load(f)
-            logger.info(f"İlerleme dosyası yüklendi: {len(progress.get('completed', []))} kayıt tamamlanmış")
-            return progress
-        else:
-            with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-                json.dump({"completed": [], "last_updated": None}, f, ensure_ascii=False, indent=2)
-        return load_progress()
+        progress = ProgressStore(PROGRESS_LOG, PROGRESS_FILE)
+        logger.info(f"İlerleme dosyası yüklendi: {len(progress)} kayıt tamamlanmış")
+        return progress
     except Exception as e:
         logger.error("İlerleme dosyası yüklenirken hata oluştu", e)
-        return {"completed": [], "last_updated": None}
-
-def save_progress(progress):
-    """İşlem ilerlemesini kaydeder"""
-    try:
-        progress["last_updated"] = datetime.now().isoformat()
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(progress, f, ensure_ascii=False, indent=2)
-        logger.debug("İlerleme dosyası güncellendi")
-    except Exception as e:
-        logger.error("İlerleme dosyası kaydedilirken hata oluştu", e)
+        raise
 
 def add_completed_record(progress, station_id, date):
-    """Tamamlanan kaydı ilerlemete ekler"""
-    record_key = f"{station_id}_{date}"
-    if record_key not in progress["completed"]:
-        progress["completed"].append(record_key)
-        save_progress(progress)
-        logger.info(f"Tamamlanan kayıt eklendi: {record_key}")
+    """Tamamlanan kaydı ilerlemeye ekler"""
+    if progress.add(station_id, date):
+        logger.info("Tamamlanan kayıt eklendi: %s", ProgressStore.record_key(station_id, date))
 
 def is_already_processed(progress, station_id, date):
     """Kayıt daha önce işlenmiş mi kontrol eder"""
-    record_key = f"{station_id}_{date}"
-    return record_key in progress["completed"]
+    return progress.is_completed(station_id, date)
 
 def get_all_dates(station_profile):
-    """Station profile'ı veritabanından alır
-    # get all dates from station folder path
-        # path: ./station_id/
+    """Tüm station klasörlerindeki tarih klasörlerini bulur
+    # path: ./station_id/date/
+    RETURN:
+        list[WorkItem]: (station_id, date) kayıtları
     """
     try:
-        # get all dates from station folder path
-        # path: ./station_id/
-        dates = pd.DataFrame(columns=['station_id', 'date'])
-        for _, station in station_profile.iterrows():
-            station_folder_path = f"{os.getenv('path')}{str(station['ID'])}/"
-            if os.path.exists(station_folder_path):
-                dates = pd.concat([dates, pd.DataFrame([{'station_id': str(station['ID']), 'date': f} for f in os.listdir(station_folder_path) if os.path.isdir(os.path.join(station_folder_path, f))])], ignore_index=True)
-            else:
-                logger.warning(f"{station_folder_path} klasörü bulunamadı")
-            logger.info(f"Station {station['ID']} için tarihler: {dates}")
-        return dates
+        return discover_work(
+            station_profile['ID'].tolist(),
+            os.getenv('path'),
+            manifest_path=DISCOVERY_MANIFEST,
+            max_workers=int(os.getenv('DISCOVERY_WORKERS', '8')),
+        )
     except Exception as e:
-        logger.error("Station profile'ı alırken hata oluştu", e)
+        logger.error("Station klasörleri taranırken hata oluştu", e)
         raise
 
+PRESSURE_COLUMNS = ["Pressure1","Pressure2","Pressure3","Pressure4"]
+TEMP_COLUMNS = ["Temp1","Temp2","Temp3","Temp4"]
+
+# Sıralı modda, mevcut gün işlenirken önceden okunacak sonraki station-gün sayısı (0: kapalı)
+READAHEAD_DAYS = int(os.getenv('READAHEAD_DAYS', '1'))
+
+def read_station_day(station_id, date, cycle_ids=None):
+    """Bir station-günün cycle dosyalarını okur (G/Ç ağırlıklı kısım)"""
+    logger.info("%s tarihli veri işleme başlatıldı", date)
+
+    print(f"{date} dosyasından veri çekiliyor...")
+    return data_extraction(date,station_id,as_batch=True,cycle_ids=cycle_ids)
+
+def extract_station_day(station_id, date, cycle_ids=None, data=None):
+    """Bir station-gün için veriyi okur ve özellikleri çıkarır (CPU ağırlıklı kısım)
+
+    Worker process'lerde de çalışır; veritabanına yazmaz.
+    cycle_ids verilirse yalnızca bu cycle'lar işlenir. data verilirse (önceden
+    okunmuşsa) dosyalar tekrar okunmaz. Veri yoksa None döndürür.
+    """
+    if data is None:
+        data = read_station_day(station_id, date, cycle_ids)
+    if len(data) == 0:
+        logger.error(f"{date} dosyasından veri çekilemedi")
+        return None
+    logger.info("%s dosyasından %s veri çekildi", date, len(data))
+    print(f"{date} dosyasından {len(data)} veri çekildi.")
+
+    features = feature_extraction(data, PRESSURE_COLUMNS, TEMP_COLUMNS)
+    logger.info("%s dosyasından özellikler çıkarıldı", date)
+    print(f"{date} dosyasından özellikler çıkarıldı.")
+    return features
+
+@metrics.timed("write_features")
+def write_features(features, station_id, date):
+    """Çıkarılan özellikleri veritabanına yazar (yalnızca ana process'te, tek yazıcı)"""
+    features_list = list(features.keys())
+    feature_list_db = insert_new_features(features_list)
+    logger.info(f"Özellik listesi veritabanından alındı")
+    print(f"Özellik listesi dbden alındı.")
+
+    # Veriyi cycle_id, feature_id, feature_value formatına dönüştür
+    data_with_id = format_data_with_id(features, feature_list_db)
+
+    if is_test:
+        insert_cycle_data(data_with_id, date)
+        logger.info(f"Veriler test veritabanına eklendi")
+        print(f"Veriler test veritabanına eklendi.")
+    else:
+        if UPSERT_MODE == "merge":
+            merge_feature_values(data_with_id, station_id)
+        elif UPSERT_MODE == "async":
+            insert_feature_values_concurrent(data_with_id, station_id, batch_size=BATCH_SIZE)
+        else:
+            insert_feature_values(data_with_id,station_id,batch_size=BATCH_SIZE)
+        logger.info(f"Veriler MySQL veritabanına eklendi")
+        print(f"Veriler eklendi.")
+
+    if feature_cache is not None:
+        try:
+            feature_cache.write(features, station_id, date)
+        except Exception as e:
+            # Önbellek isteğe bağlıdır; yazılamaması veritabanı kaydını etkilemez
+            logger.error(f"{station_id}_{date} özellik önbelleğine yazılamadı", e)
+
+def write_station_day(features, station_id, date, progress=None):
+    """Çıkarılan özellikleri veritabanına yazar ve ilerlemeyi günceller
+
+    Yalnızca ana process'te (tek yazıcı) çağrılır.
+    """
+    write_features(features, station_id, date)
+    metrics.inc("station_days")
+    logger.info("%s tarihli veri işleme başarıyla tamamlandı", date)
+
+    # Progress dosyasını güncelle (sadece all modunda)
+    if progress is not None:
+        add_completed_record(progress, station_id, date)
+
+def plan_station_day(fingerprints, station_id, date):
+    """Parmak izine göre station-günün nasıl işleneceğini belirler (fingerprints None ise her zaman tam işlem)"""
+    if fingerprints is None:
+        return None
+    plan = fingerprints.plan(station_id, date)
+    if plan.action == "skip":
+        logger.info("%s_%s değişmemiş, atlanıyor", station_id, date)
+    elif plan.action == "incremental":
+        logger.info("%s_%s için yalnızca %s yeni/değişen cycle işlenecek", station_id, date, len(plan.cycle_ids))
+    return plan
+
+def stream_station_day(station_id, date, chunk_size, cycle_ids=None, progress=None):
+    """Bir station-günü parça parça işler: tamamlanmış cycle'lar chunk_size'lık gruplar halinde okunur, özellikleri çıkarılır ve yazılır
+
+    Bellek kullanımı günün büyüklüğünden bağımsızdır. Kanalları eksik cycle
+    varsa gün ilerlemeye eklenmez; bu cycle'lar sonraki çalıştırmada işlenir.
+
+    Returns:
+        set: Kanalları eksik olduğu için atlanan cycle id'leri; veri yoksa None
+    """
+    logger.info("%s tarihli veri akış modunda işleniyor (parça: %s cycle)", date, chunk_size)
+    total = 0
+    batches, skipped = iter_cycle_batches(date, station_id, chunk_size=chunk_size, cycle_ids=cycle_ids)
+    for data in batches:
+        if len(data) == 0:
+            continue
+        features = feature_extraction(data, PRESSURE_COLUMNS, TEMP_COLUMNS)
+        write_features(features, station_id, date)
+        total += len(data)
+        logger.info("%s: %s cycle yazıldı", date, total)
+
+    if total == 0 and not skipped:
+        logger.error(f"{date} dosyasından veri çekilemedi")
+        return None
+    metrics.inc("station_days")
+    if skipped:
+        logger.warning("%s tarihli veride kanalları eksik %s cycle kaldı; gün tamamlandı olarak işaretlenmedi", date, len(skipped))
+        return skipped
+    logger.info("%s tarihli veri işleme başarıyla tamamlandı", date)
+    if progress is not None:
+        add_completed_record(progress, station_id, date)
+    return skipped
+
+def planned_station_days(work_items, progress=None, fingerprints=None):
+    """Atlanmayacak station-günleri (station_id, date, plan) olarak tembel üretir; atlananları ilerlemeye ekler"""
+    for station_id, date in work_items:
+        plan = plan_station_day(fingerprints, station_id, date)
+        if plan is not None and plan.action == "skip":
+            metrics.inc("station_days_skipped")
+            if progress is not None:
+                add_completed_record(progress, station_id, date)
+            continue
+        yield station_id, date, plan
+
+def process_sequential(work_items, progress=None, fingerprints=None, stream_chunk=0):
+    """Station-gün kayıtlarını sırayla işler (stream_chunk > 0 ise akış modunda)
+
+    Akış modu dışında, mevcut gün işlenirken sonraki READAHEAD_DAYS günün
+    dosyaları arka planda okunur.
+    """
+    days = planned_station_days(work_items, progress, fingerprints)
+    if stream_chunk > 0:
+        for station_id, date, plan in days:
+            skipped = stream_station_day(station_id, date, stream_chunk, plan.cycle_ids if plan else None, progress)
+            if skipped is None:
+                continue
+            if plan is not None:
+                # Atlanan cycle'ların dosyaları parmak izine girmez, sonraki çalıştırmada yeniden planlanır
+                fingerprints.commit(without_cycles(plan, skipped))
+        return
+
+    def read(day):
+        station_id, date, plan = day
+        return read_station_day(station_id, date, plan.cycle_ids if plan else None)
+
+    for (station_id, date, plan), data, error in prefetch(read, days, max_workers=min(READAHEAD_DAYS, 1), max_in_flight=READAHEAD_DAYS):
+        if error is not None:
+            raise error
+        features = extract_station_day(station_id, date, data=data)
+        if features is None:
+            continue
+        write_station_day(features, station_id, date, progress)
+        if plan is not None:
+            fingerprints.commit(plan)
+
+def extract_in_worker(station_id, date, cycle_ids=None):
+    """Worker process'te extract_station_day'i çalıştırır; özellikleri ve bu işin metriklerini döndürür"""
+    metrics.reset()
+    return extract_station_day(station_id, date, cycle_ids), metrics.snapshot()
+
+def process_parallel(work_items, workers, progress=None, fingerprints=None):
+    """Station-gün kayıtlarını process havuzunda paralel işler
+
+    Okuma ve özellik çıkarma worker process'lerde yapılır. Veritabanı
+    yazmaları ve progress güncellemeleri ana process'te sırayla yapılır.
+    Bellek sınırlı kalsın diye aynı anda en fazla 2 * workers iş bekler.
+    """
+    jobs = planned_station_days(work_items, progress, fingerprints)
+    max_in_flight = 2 * workers
+    # Worker logları kuyrukla ana process'e gönderilir ve dosyalara tek yerden yazılır
+    with ProcessPoolExecutor(max_workers=workers, initializer=Logger.init_worker, initargs=(logger.worker_queue(),)) as executor:
+        pending = {}
+        try:
+            while True:
+                for station_id, date, plan in jobs:
+                    future = executor.submit(extract_in_worker, station_id, date, plan.cycle_ids if plan else None)
+                    pending[future] = (station_id, date, plan)
+                    if len(pending) >= max_in_flight:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    station_id, date, plan = pending.pop(future)
+                    features, worker_metrics = future.result()
+                    # Worker'da ölçülen okuma/özellik çıkarma metrikleri ana process'te birleştirilir
+                    metrics.merge(worker_metrics)
+                    if features is None:
+                        continue
+                    write_station_day(features, station_id, date, progress)
+                    if plan is not None:
+                        fingerprints.commit(plan)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+def read_for_pipeline(day):
+    """Hat modunda okuma aşaması; özellik çıkarma process'ine yalnızca station_id, tarih ve veri gönderilir"""
+    station_id, date, plan = day
+    return station_id, date, read_station_day(station_id, date, plan.cycle_ids if plan else None)
+
+def featurize_in_worker(read_result):
+    """Hat modunda worker process'te özellikleri çıkarır; özellikleri ve bu işin metriklerini döndürür"""
+    station_id, date, data = read_result
+    metrics.reset()
+    return extract_station_day(station_id, date, data=data), metrics.snapshot()
+
+def process_pipelined(work_items, workers, progress=None, fingerprints=None):
+    """Station-gün kayıtlarını okuma, özellik çıkarma ve yazma aşamaları örtüşecek şekilde işler
+
+    Okuma thread havuzunda, özellik çıkarma workers process'te, veritabanı
+    yazmaları ve progress güncellemeleri tek bir yazıcı thread'inde yapılır.
+    Bir gün yazılırken sonraki günler okunur ve özellikleri çıkarılır.
+    """
+    def write(day, result):
+        station_id, date, plan = day
+        features, worker_metrics = result
+        # Worker'da ölçülen özellik çıkarma metrikleri ana process'te birleştirilir
+        metrics.merge(worker_metrics)
+        if features is None:
+            return
+        write_station_day(features, station_id, date, progress)
+        if plan is not None:
+            fingerprints.commit(plan)
+
+    pipeline = Pipeline(
+        read_for_pipeline, featurize_in_worker, write,
+        feature_workers=workers,
+        initializer=Logger.init_worker, initargs=(logger.worker_queue(),),
+    )
+    logger.info("Hat modu: %s okuma thread'i, %s özellik worker'ı, en fazla %s gün hatta", pipeline.readers, pipeline.feature_workers, pipeline.max_in_flight)
+    pipeline.run(planned_station_days(work_items, progress, fingerprints))
+
+def process_watched_cycles(station_id, date, cycle_files, fingerprints=None):
+    """İzleme modunda tamamlanan cycle'ların özelliklerini çıkarır ve yazar
+
+    fingerprints verilirse işlenen dosyalar günün parmak izine eklenir; toplu
+    çalıştırma bu cycle'ları yeniden işlemez.
+    """
+    # Dosya bilgisi okumadan önce alınır; işlem sırasında değişen dosya sonraki çalıştırmada yeniden işlenir
+    day_folder_path = os.path.join(os.getenv('path'), str(station_id), date)
+    files = stat_files(day_folder_path, (path for channels in cycle_files.values() for path in channels.values()))
+    data = load_cycle_batch(cycle_files)
+    if len(data) > 0:
+        features = feature_extraction(data, PRESSURE_COLUMNS, TEMP_COLUMNS)
+        write_features(features, station_id, date)
+        logger.info("%s_%s: %s yeni cycle yazıldı", station_id, date, len(data))
+    if fingerprints is not None:
+        fingerprints.add_files(station_id, date, files)
+
+def run_watch(station_profile):
+    """Station klasörlerini izler ve yeni cycle'ları birkaç saniye içinde işler (Ctrl+C ile durur)"""
+    fingerprints = FingerprintStore(FINGERPRINT_DB) if SKIP_UNCHANGED else None
+    watcher = CycleWatcher(
+        os.getenv('path'),
+        station_profile['ID'].tolist(),
+        functools.partial(process_watched_cycles, fingerprints=fingerprints),
+        poll_interval=float(os.getenv('WATCH_POLL_INTERVAL', '2')),
+        settle_time=float(os.getenv('WATCH_SETTLE_TIME', '1')),
+        max_retries=int(os.getenv('WATCH_MAX_RETRIES', '3')),
+        retry_delay=float(os.getenv('WATCH_RETRY_DELAY', '5')),
+    )
+    try:
+        watcher.run()
+    finally:
+        if fingerprints is not None:
+            fingerprints.close()
+
+def run_compact(station_profile, compression="none", remove_sources=False):
+    """Tamamlanmış (dünden eski) tarih klasörlerini tek bir pack dosyasına sıkıştırır"""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    work_items = [item for item in get_all_dates(station_profile) if item.date < yesterday]
+    packed_days = 0
+    for station_id, date in work_items:
+        try:
+            if compact_day(date, station_id, compression=compression, remove_sources=remove_sources):
+                packed_days += 1
+        except Exception as e:
+            logger.error(f"{station_id}_{date} sıkıştırılırken hata oluştu", e)
+    logger.info(f"{len(work_items)} station-günden {packed_days} tanesi sıkıştırıldı")
+
+def write_run_metrics(mode, workers, status):
+    """Çalıştırmanın metriklerini METRICS_FILE'a (ve varsa Prometheus dosyasına) yazar"""
+    try:
+        if METRICS_FILE:
+            metrics.write_run(METRICS_FILE, mode=mode, workers=workers, status=status)
+        if METRICS_PROM_FILE:
+            metrics.dump_prometheus(METRICS_PROM_FILE)
+    except Exception as e:
+        logger.error("Metrikler yazılırken hata oluştu", e)
+
+def parse_args(argv):
+    """Komut satırı argümanlarını okur"""
+    parser = argparse.ArgumentParser(description="TÜBİTAK veri çıkarma")
+    parser.add_argument("mode", nargs="?", default=None, help="'all' ise tüm tarihler, 'watch' ise sürekli izleme, 'compact' ise eski günleri sıkıştırma, aksi halde bugün ve dün")
+    parser.add_argument("--workers", type=int, default=int(os.getenv('WORKERS', '1')),
+                        help="Paralel çalışacak process sayısı (varsayılan: 1, sıralı)")
+    parser.add_argument("--stream-chunk", type=int, default=int(os.getenv('STREAM_CHUNK_SIZE', '0')),
+                        help="Akış modu: günü bu kadar cycle'lık parçalar halinde işle (0: kapalı)")
+    parser.add_argument("--pipeline", action="store_true", default=os.getenv('PIPELINE', 'false').lower() == 'true',
+                        help="Okuma, özellik çıkarma ve yazma aşamalarını örtüştür (özellik worker sayısı: --workers)")
+    parser.add_argument("--compression", choices=["none", "zlib"], default=os.getenv('PACK_COMPRESSION', 'none'),
+                        help="compact modu: pack değerlerinin sıkıştırması (varsayılan: none)")
+    parser.add_argument("--remove-sources", action="store_true",
+                        help="compact modu: pack doğrulandıktan sonra .bin dosyalarını sil")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
 if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        logger.info(f"Metrikler :{METRICS_PORT}/metrics adresinde sunuluyor")
+    status = "error"
     try:
-        if len(sys.argv) == 2:
-            if sys.argv[1] == "all":
-                # Tüm tarihleri işle
-                is_all_dates = True
-                logger.info("Tüm tarihler işlenecek")
-            else:
-                # Belirli bir tarih işlenecek
-                is_all_dates = False
-                logger.info("Bugünün tarihi işlenecek")
+        if args.mode == "watch":
+            logger.info("İzleme modu başlatıldı")
+            run_watch(get_station_profile())
+            status = "ok"
+            sys.exit(0)
+        if args.mode == "compact":
+            logger.info("Sıkıştırma modu başlatıldı")
+            run_compact(get_station_profile(), args.compression, args.remove_sources)
+            status = "ok"
+            sys.exit(0)
+        if args.mode == "all":
+            # Tüm tarihleri işle
+            is_all_dates = True
+            logger.info("Tüm tarihler işlenecek")
         else:
             # Belirli bir tarih işlenecek
             is_all_dates = False
@@ -109,69 +447,42 @@ if __name__ == "__main__":
         progress = None
         if is_all_dates:
             progress = load_progress()
-            logger.info(f"İşlem devam modu aktif. Tamamlanan kayıt sayısı: {len(progress['completed'])}")
+            logger.info(f"İşlem devam modu aktif. Tamamlanan kayıt sayısı: {len(progress)}")
             
         station_profile = get_station_profile()
         logger.info(f"Station profile'ı veritabanından alındı")
         if is_all_dates:
-            dates = get_all_dates(station_profile)
+            work_items = get_all_dates(station_profile)
             # Daha önce işlenmemiş kayıtları filtrele
-            if progress:
-                original_count = len(dates)
-                dates = dates[~dates.apply(lambda row: is_already_processed(progress, row['station_id'], row['date']), axis=1)]
-                filtered_count = len(dates)
+            if progress is not None:
+                original_count = len(work_items)
+                work_items = [item for item in work_items if not is_already_processed(progress, item.station_id, item.date)]
+                filtered_count = len(work_items)
                 logger.info(f"Filtreleme sonucu: {original_count} kayıttan {filtered_count} kayıt işlenecek ({original_count - filtered_count} kayıt daha önce işlenmiş)")
         else:
             today = datetime.now().strftime("%Y-%m-%d")
-            dates = pd.DataFrame(columns=['station_id', 'date'])
-            dates = pd.concat([dates, pd.DataFrame([{'station_id': str(station['ID']), 'date': today} for _, station in station_profile.iterrows()])], ignore_index=True)
             yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-            dates = pd.concat([dates, pd.DataFrame([{'station_id': str(station['ID']), 'date': yesterday} for _, station in station_profile.iterrows()])], ignore_index=True)
+            station_ids = [str(station_id) for station_id in station_profile['ID']]
+            work_items = [WorkItem(station_id, today) for station_id in station_ids] + [WorkItem(station_id, yesterday) for station_id in station_ids]
 
-        for index, row in dates.iterrows():
-            logger.info(f"{row['date']} tarihli veri işleme başlatıldı")
-            
-            print(f"{row['date']} dosyasından veri çekiliyor...")
-            data = data_extraction(row['date'],row['station_id'])
-            if len(data) == 0:
-                logger.error(f"{row['date']} dosyasından veri çekilemedi")
-                continue
-            logger.info(f"{row['date']} dosyasından {len(data)} veri çekildi")
-            print(f"{row['date']} dosyasından {len(data)} veri çekildi.")
-        
-            pressure_columns = ["Pressure1","Pressure2","Pressure3","Pressure4"]
-            temp_columns = ["Temp1","Temp2","Temp3","Temp4"]
-            features = feature_extraction(data, pressure_columns, temp_columns)
-            logger.info(f"{row['date']} dosyasından özellikler çıkarıldı")
-            print(f"{row['date']} dosyasından özellikler çıkarıldı.")
-            
-            features_list = list(features.keys())
-            feature_list_db = insert_new_features(features_list)
-            logger.info(f"Özellik listesi veritabanından alındı")
-            print(f"Özellik listesi dbden alındı.")
-            
-            # Veriyi cycle_id, feature_id, feature_value formatına dönüştür
-            data_with_id = format_data_with_id(features, feature_list_db)
-            
-            if is_test:
-                insert_cycle_data(data_with_id, row['date'])
-                logger.info(f"Veriler test veritabanına eklendi")
-                print(f"Veriler test veritabanına eklendi.")
-            else:
-                insert_feature_values(data_with_id,row['station_id'],batch_size=1000)
-                logger.info(f"Veriler MySQL veritabanına eklendi")
-                print(f"Veriler eklendi.")
-                
-            logger.info(f"{row['date']} tarihli veri işleme başarıyla tamamlandı")
-            
-            # Progress dosyasını güncelle (sadece all modunda)
-            if is_all_dates and progress is not None:
-                add_completed_record(progress, row['station_id'], row['date'])
-        
+        # Girdileri ve EXTRACTOR_VERSION'ı değişmeyen station-günleri atla
+        fingerprints = FingerprintStore(FINGERPRINT_DB) if SKIP_UNCHANGED else None
+
+        if args.pipeline:
+            if args.stream_chunk > 0:
+                logger.warning("Akış modu hat modunda kullanılmaz, yok sayıldı")
+            process_pipelined(work_items, args.workers, progress, fingerprints)
+        elif args.workers > 1:
+            logger.info(f"Paralel mod: {args.workers} worker")
+            if args.stream_chunk > 0:
+                logger.warning("Akış modu yalnızca sıralı çalışmada kullanılır, paralel modda yok sayıldı")
+            process_parallel(work_items, args.workers, progress, fingerprints)
+        else:
+            process_sequential(work_items, progress, fingerprints, args.stream_chunk)
+        status = "ok"
         
     except Exception as e:
         logger.error("Veri işleme sırasında hata oluştu", e)
         raise
-
-
-
+    finally:
+        write_run_metrics(args.mode or "daily", args.workers, status)
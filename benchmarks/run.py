@@ -0,0 +1,206 @@
+"""
+Aşama bazında performans ölçümü
+
+Sentetik bir station ağacı üretir (veya --data ile verilen ağacı kullanır) ve
+işlem hattının her aşamasını ayrı ayrı ölçer: discovery, data_extraction,
+feature_extraction, insert_new_features, format_data_with_id ve SQLite'a karşı
+insert_feature_values. Sonuçlar commit'ler arasında karşılaştırılabilmesi için
+JSON olarak yazılır.
+
+Kullanım:
+    python -m benchmarks.run --stations 2 --days 2 --cycles 200 --samples 2000 --output sonuc.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+
+STAGES = [
+    "discovery",
+    "data_extraction",
+    "feature_extraction",
+    "insert_new_features",
+    "format_data_with_id",
+    "insert_feature_values",
+    "insert_feature_values_rerun",
+]
+
+def batch_size_arg(value):
+    """--batch-size değeri: sayı veya uyarlamalı boyut için 'auto' (None)"""
+    return None if value.lower() == "auto" else int(value)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Aşama bazında performans ölçümü")
+    parser.add_argument("--stations", type=int, default=2, help="Station sayısı")
+    parser.add_argument("--days", type=int, default=2, help="Station başına gün sayısı")
+    parser.add_argument("--cycles", type=int, default=200, help="Gün başına cycle sayısı")
+    parser.add_argument("--samples", type=int, default=2000, help="Kanal başına ortalama örnek sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Sentetik veri tohumu")
+    parser.add_argument("--repeat", type=int, default=3, help="Ölçüm tekrarı (her aşama için min/medyan raporlanır)")
+    parser.add_argument("--batch-size", type=batch_size_arg, default=1000, help="insert_feature_values batch boyutu ('auto': uyarlamalı)")
+    parser.add_argument("--data", default=None, help="Mevcut station ağacı (verilmezse geçici klasörde üretilir)")
+    parser.add_argument("--workdir", default=None, help="Sentetik veri ve SQLite dosyası için klasör (verilmezse geçici)")
+    parser.add_argument("--keep", action="store_true", help="Üretilen geçici klasörü silme")
+    parser.add_argument("--output", default=None, help="Sonuç JSON dosyası (verilmezse stdout)")
+    return parser.parse_args(argv)
+
+def git_commit():
+    """Çalışılan commit'i döndürür (git yoksa None)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def reset_database(execute_query):
+    """SQLite tablolarını sıfırdan oluşturur (SQL Server şemasının sadeleştirilmiş hali)"""
+    execute_query("DROP TABLE IF EXISTS EXTRACTED_FEATURES")
+    execute_query("DROP TABLE IF EXISTS FEATURES_LOOKUP")
+    execute_query("CREATE TABLE FEATURES_LOOKUP (FEATURE_ID INTEGER PRIMARY KEY, FEATURE_NAME TEXT UNIQUE)")
+    execute_query(
+        """
+        CREATE TABLE EXTRACTED_FEATURES (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            CYCLE_ID INTEGER,
+            FEATURE_ID INTEGER,
+            FEATURE_VALUE REAL,
+            STATION_ID INTEGER,
+            EXTRACTOR_VERSION TEXT
+        )
+        """
+    )
+    execute_query("CREATE INDEX IX_EXTRACTED_FEATURES ON EXTRACTED_FEATURES (STATION_ID, CYCLE_ID, FEATURE_ID)")
+
+def run_once(data_path, station_ids, batch_size):
+    """İşlem hattını bir kez çalıştırır; aşama -> süre (saniye) ve sayaçları döndürür"""
+    from scripts.discovery import discover_work
+    from scripts.read_bin import data_extraction
+    from scripts.feature_extraction import feature_extraction
+    from scripts.db_connection import execute_query
+    from scripts.db_functions import insert_new_features, format_data_with_id, insert_feature_values, reset_feature_cache
+    from scripts.metrics import Metrics
+    from benchmarks.synthetic import CHANNELS
+
+    pressure_columns = [c for c in CHANNELS if c.startswith("Pressure")]
+    temp_columns = [c for c in CHANNELS if c.startswith("Temp")]
+
+    reset_database(execute_query)
+    reset_feature_cache()
+    Metrics().reset()
+
+    timings = defaultdict(float)
+    counts = defaultdict(int)
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[stage] += time.perf_counter() - start
+        return result
+
+    work_items = timed("discovery", discover_work, station_ids, data_path, manifest_path=None)
+    counts["station_days"] = len(work_items)
+
+    for station_id, date in work_items:
+        data = timed("data_extraction", data_extraction, date, station_id, as_batch=True)
+        counts["cycles"] += len(data)
+        if len(data) == 0:
+            continue
+        features = timed("feature_extraction", feature_extraction, data, pressure_columns, temp_columns)
+        feature_list_db = timed("insert_new_features", insert_new_features, list(features.columns))
+        data_with_id = timed("format_data_with_id", format_data_with_id, features, feature_list_db)
+        counts["feature_values"] += len(data_with_id)
+        timed("insert_feature_values", insert_feature_values, data_with_id, station_id, batch_size=batch_size)
+        # Aynı veri tekrar yazıldığında (değişiklik yok) yalnızca kontrol maliyeti ölçülür
+        timed("insert_feature_values_rerun", insert_feature_values, data_with_id, station_id, batch_size=batch_size)
+
+    # SQL sorgu, okunan dosya/byte vb. sayaçlar
+    counts.update(Metrics().snapshot()["counters"])
+    return dict(timings), dict(counts)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tubitak_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    data_path = args.data or os.path.join(workdir, "data")
+
+    # Uygulama modülleri ortam değişkenlerini import sırasında okur
+    os.environ['IS_TEST'] = 'true'
+    os.environ['SQLITE_PATH'] = os.path.join(workdir, "bench.db")
+    os.environ['path'] = data_path
+    os.environ.setdefault('EXTRACTOR_VERSION', 'bench')
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+
+    from benchmarks.synthetic import generate_station_tree
+
+    try:
+        if args.data:
+            station_ids = sorted(entry.name for entry in os.scandir(data_path) if entry.is_dir())
+            dataset = {"station_ids": station_ids}
+        else:
+            start = time.perf_counter()
+            dataset = generate_station_tree(
+                data_path, stations=args.stations, days=args.days, cycles=args.cycles,
+                samples=args.samples, seed=args.seed
+            )
+            dataset["generate_seconds"] = time.perf_counter() - start
+            station_ids = dataset["station_ids"]
+
+        runs = defaultdict(list)
+        counts = {}
+        for _ in range(args.repeat):
+            timings, counts = run_once(data_path, station_ids, args.batch_size)
+            for stage in STAGES:
+                runs[stage].append(timings.get(stage, 0.0))
+
+        import numpy as np
+        import pandas as pd
+        result = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "params": {
+                "stations": args.stations, "days": args.days, "cycles": args.cycles,
+                "samples": args.samples, "seed": args.seed, "repeat": args.repeat,
+                "batch_size": args.batch_size, "data": args.data,
+            },
+            "dataset": {key: value for key, value in dataset.items() if key != "station_ids"},
+            "counts": counts,
+            "stages": {
+                stage: {
+                    "min": min(runs[stage]),
+                    "median": statistics.median(runs[stage]),
+                    "runs": runs[stage],
+                }
+                for stage in STAGES
+            },
+        }
+        result["total_min"] = sum(stage["min"] for stage in result["stages"].values())
+
+        output = json.dumps(result, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        return result
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
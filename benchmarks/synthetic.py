@@ -0,0 +1,63 @@
+import os
+import numpy as np
+from datetime import datetime, timedelta
+
+CHANNELS = ["Pressure1", "Pressure2", "Pressure3", "Pressure4", "Temp1", "Temp2", "Temp3", "Temp4"]
+
+def synthetic_cycle(rng, samples, channel):
+    """Tek bir kanal için basınç/sıcaklık benzeri float32 sinyal üretir"""
+    t = np.linspace(0, 1, samples)
+    if channel.startswith("Pressure"):
+        # Birkaç tepeli basınç eğrisi + gürültü
+        signal = 50 * np.sin(np.pi * t) ** 2 + 5 * np.sin(2 * np.pi * rng.uniform(3, 8) * t)
+    else:
+        # Yavaş yükselen sıcaklık + kayma
+        signal = 20 + 15 * t + rng.normal(0, 0.05, samples).cumsum()
+    signal += rng.normal(0, 0.5, samples)
+    return signal.astype(np.float32)
+
+def generate_station_tree(base_path, stations=2, days=2, cycles=200, samples=2000,
+                          start_date="2025-01-01", seed=0, sample_jitter=0.2):
+    """
+    data_extraction'ın beklediği klasör ve dosya adı düzeninde sentetik veri üretir
+
+    {base_path}/{station_id}/{YYYY-MM-DD}/X_{cycle_id} {YYYY-MM-DD} {HH-MM-SS}_{kanal}.bin
+
+    Args:
+        base_path (str): Ana klasör (uygulamadaki 'path' ayarı)
+        stations (int): Station sayısı (ID'ler 1..stations)
+        days (int): Station başına gün sayısı
+        cycles (int): Gün başına cycle sayısı
+        samples (int): Kanal başına ortalama örnek sayısı
+        start_date (str): İlk gün
+        seed (int): Rastgele sayı üreteci tohumu
+        sample_jitter (float): Cycle'lar arası örnek sayısı oynaklığı (0.2: ±%20)
+
+    Returns:
+        dict: Üretilen station_ids, dates, files ve bytes bilgisi
+    """
+    rng = np.random.default_rng(seed)
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    station_ids = [str(i) for i in range(1, stations + 1)]
+    files = 0
+    total_bytes = 0
+
+    for station_id in station_ids:
+        for day_index, date in enumerate(dates):
+            day_folder_path = os.path.join(base_path, station_id, date)
+            os.makedirs(day_folder_path, exist_ok=True)
+            for i in range(cycles):
+                cycle_id = day_index * cycles + i + 1
+                seconds = (i * 86400) // max(cycles, 1)
+                time_part = f"{seconds // 3600:02d}-{seconds % 3600 // 60:02d}-{seconds % 60:02d}"
+                low = max(1, int(samples * (1 - sample_jitter)))
+                high = max(low + 1, int(samples * (1 + sample_jitter)) + 1)
+                n = int(rng.integers(low, high))
+                for channel in CHANNELS:
+                    data = synthetic_cycle(rng, n, channel)
+                    data.tofile(os.path.join(day_folder_path, f"X_{cycle_id} {date} {time_part}_{channel}.bin"))
+                    files += 1
+                    total_bytes += data.nbytes
+
+    return {"station_ids": station_ids, "dates": dates, "files": files, "bytes": total_bytes}
@@ -0,0 +1,202 @@
+import os
+import asyncio
+import importlib.util
+import sqlite3
+import threading
+import urllib.parse
+import pandas as pd
+from typing import Optional, Any
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from scripts.logger import Logger
+from scripts.metrics import Metrics
+from scripts.db_connection import (
+    ConnectionError, QueryError, handle_database_error, odbc_connection_string, to_db_rows,
+    _is_test, _to_named_params, _count_statement, _unwrap_error, _is_connection_error,
+)
+
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:  # greenlet kurulu değilse asenkron yazıcı kullanılamaz
+    create_async_engine = None
+
+# Logger'ı başlat
+logger = Logger()
+
+# Metrikleri başlat
+metrics = Metrics()
+
+# Aynı anda veritabanına gönderilen (ayrı bağlantılarda) en fazla batch sayısı
+ASYNC_DB_CONCURRENCY = int(os.getenv('ASYNC_DB_CONCURRENCY', '4'))
+
+# Process başına tek event loop thread'i ve tek asenkron engine
+_loop = None
+_loop_pid = None
+_engine = None
+_lock = threading.Lock()
+
+def _get_loop():
+    """Asenkron veritabanı işlerinin çalıştığı arka plan event loop'unu döndürür (ilk çağrıda başlatır)"""
+    global _loop, _loop_pid, _engine
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            if _engine is not None:
+                # Üst process'ten kalan bağlantıları kapatmadan bırak
+                _engine.sync_engine.dispose(close=False)
+                _engine = None
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="async-db", daemon=True).start()
+        return _loop
+
+def run_sync(coro):
+    """
+    Coroutine'i arka plandaki asenkron veritabanı thread'inde çalıştırır ve sonucunu bekler
+
+    Engine ve bağlantı havuzu bu thread'in event loop'una bağlıdır; böylece
+    senkron koddan yapılan ardışık çağrılar aynı havuzu kullanır.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+def check_async_dependencies():
+    """
+    Asenkron veritabanı yazıcısının gerektirdiği paketlerin kurulu olduğunu kontrol eder
+
+    Raises:
+        ImportError: greenlet veya sürücü (SQL Server için aioodbc, test ortamında aiosqlite) kurulu değilse
+    """
+    if create_async_engine is None:
+        raise ImportError("Asenkron veritabanı yazıcısı için greenlet gerekli: pip install greenlet")
+    driver = "aiosqlite" if _is_test() else "aioodbc"
+    if importlib.util.find_spec(driver) is None:
+        raise ImportError(f"Asenkron veritabanı yazıcısı için {driver} gerekli: pip install {driver}")
+
+def get_async_engine():
+    """
+    Asenkron SQLAlchemy engine'i döndürür (yalnızca arka plan event loop'unda kullanılır)
+
+    SQL Server için mssql+aioodbc, test ortamında sqlite+aiosqlite kullanılır.
+    Havuz boyutu ASYNC_DB_CONCURRENCY'dir.
+    """
+    global _engine
+    if _engine is None:
+        check_async_dependencies()
+        try:
+            if _is_test():
+                _engine = create_async_engine(
+                    f"sqlite+aiosqlite:///{os.getenv('SQLITE_PATH', 'test.db')}",
+                    # Eşzamanlı yazmalar SQLite kilidini bekler
+                    connect_args={"timeout": 30},
+                )
+            else:
+                _engine = create_async_engine(
+                    f"mssql+aioodbc:///?odbc_connect={urllib.parse.quote_plus(odbc_connection_string())}",
+                    pool_size=ASYNC_DB_CONCURRENCY,
+                    max_overflow=0,
+                    pool_pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+                    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800')),
+                    fast_executemany=True,
+                )
+        except ImportError as e:
+            driver = "aiosqlite" if _is_test() else "aioodbc"
+            raise ImportError(f"Asenkron veritabanı yazıcısı için {driver} gerekli: pip install {driver}") from e
+        logger.info("Asenkron veritabanı engine'i oluşturuldu")
+    return _engine
+
+def dispose_async_engine():
+    """Asenkron engine'i kapatır ve arka plan event loop'unu durdurur"""
+    global _loop, _loop_pid, _engine
+    with _lock:
+        loop, engine = _loop, _engine
+        _loop, _loop_pid, _engine = None, None, None
+    if loop is None:
+        return
+    if engine is not None:
+        asyncio.run_coroutine_threadsafe(engine.dispose(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+async def run_query(conn, query: str, params: Optional[Any] = None, fetch: bool = False, many: bool = False):
+    """Sorguyu verilen asenkron bağlantıda çalıştırır (commit yapmaz; bkz. _run_sqlalchemy)"""
+    _count_statement(params, many)
+    if params:
+        if many:
+            param_list = list(params)
+            modified_query, _ = _to_named_params(query, param_list[0])
+            result = await conn.execute(text(modified_query), [_to_named_params(query, param_set)[1] for param_set in param_list])
+        else:
+            modified_query, param_dict = _to_named_params(query, params)
+            result = await conn.execute(text(modified_query), param_dict)
+    else:
+        result = await conn.execute(text(query))
+    if fetch:
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    return True
+
+async def bulk_insert_async(conn, table: str, data: Any, columns: Optional[list] = None, chunk_size: int = 10000):
+    """Kayıtları verilen asenkron bağlantıda toplu olarak ekler (bkz. bulk_insert)"""
+    columns, rows = to_db_rows(data, columns)
+    if not rows:
+        return 0
+    if not columns:
+        raise ValueError("bulk_insert için sütun adları gerekli")
+
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    for i in range(0, len(rows), chunk_size):
+        await run_query(conn, query, rows[i:i + chunk_size], many=True)
+    return len(rows)
+
+async def run_in_transaction(func, max_retries: int = 3, retry_delay: int = 1):
+    """
+    func(conn) coroutine'ini havuzdan alınan bir bağlantıda tek transaction içinde çalıştırır
+
+    Hata olursa transaction geri alınır; bağlantı hatalarında (execute_query
+    gibi) yeniden denenir.
+
+    Raises:
+        ConnectionError: Bağlantı hataları durumunda
+        QueryError: Sorgu hataları durumunda
+    """
+    retry_count = 0
+    while True:
+        try:
+            async with get_async_engine().begin() as conn:
+                return await func(conn)
+        except (DBAPIError, sqlite3.Error) as e:
+            error_message, error_code, details = handle_database_error(_unwrap_error(e))
+            retry_count += 1
+            if _is_connection_error(error_message):
+                if retry_count < max_retries:
+                    metrics.inc("sql_retries")
+                    logger.warning(f"Bağlantı hatası (Deneme {retry_count}/{max_retries}): {error_message}")
+                    await asyncio.sleep(retry_delay)
+                    continue
+                logger.error(f"Maksimum deneme sayısına ulaşıldı. Son hata: {error_message}")
+                raise ConnectionError(error_message, error_code, details)
+            logger.error(f"Sorgu hatası: {error_message}")
+            raise QueryError(error_message, error_code=error_code)
+
+async def gather_limited(coros, limit: int = None):
+    """
+    Coroutine'leri aynı anda en fazla limit tanesi çalışacak şekilde çalıştırır
+
+    Sonuçlar coros sırasıyla döner. Biri hata verirse henüz bitmemiş olanlar
+    iptal edilir ve ilk hata yükseltilir.
+    """
+    semaphore = asyncio.Semaphore(limit or ASYNC_DB_CONCURRENCY)
+
+    async def limited(coro):
+        try:
+            async with semaphore:
+                return await coro
+        finally:
+            # Başlamadan iptal edilen coroutine'i kapat
+            coro.close()
+
+    tasks = [asyncio.ensure_future(limited(coro)) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,167 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from scripts.logger import Logger
+
+# Logger'ı başlat
+logger = Logger()
+
+# Tek sorgudaki en fazla parametre sayısı (SQL Server sınırı 2100; pay bırakılır)
+BATCH_MAX_PARAMS = int(os.getenv('BATCH_MAX_PARAMS', '2000'))
+
+# Uyarlamalı modda hedeflenen batch süresi (saniye)
+BATCH_TARGET_SECONDS = float(os.getenv('BATCH_TARGET_SECONDS', '1.0'))
+
+def batch_params(cycle_ids, feature_ids) -> int:
+    """Mevcut değer sorgusunun parametre sayısı: farklı cycle + farklı feature + station id"""
+    return len(np.unique(cycle_ids)) + len(np.unique(feature_ids)) + 1
+
+def param_limited_batches(data: pd.DataFrame, batch_size, max_params: int = None):
+    """
+    Veriyi ardışık satır dilimlerine böler; her dilim en fazla batch_size satır
+    içerir ve mevcut değer sorgusu max_params parametreyi aşmaz
+
+    batch_size bir fonksiyon ise her dilimden önce çağrılır (uyarlamalı boyut).
+    Parametre sınırını aşan dilim, sınıra sığan en uzun dilime kısaltılır.
+
+    Yields:
+        pd.DataFrame: Satır dilimi
+    """
+    max_params = max_params or BATCH_MAX_PARAMS
+    cycle_ids = data['CYCLE_ID'].to_numpy()
+    feature_ids = data['FEATURE_ID'].to_numpy()
+    start = 0
+    while start < len(data):
+        size = batch_size() if callable(batch_size) else batch_size
+        end = min(start + max(int(size), 1), len(data))
+        if batch_params(cycle_ids[start:end], feature_ids[start:end]) > max_params:
+            # Farklı değer sayısı dilim uzadıkça azalmadığı için ikili arama ile sığan en uzun dilim bulunur
+            low, high = start + 1, end - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if batch_params(cycle_ids[start:middle], feature_ids[start:middle]) <= max_params:
+                    low = middle
+                else:
+                    high = middle - 1
+            end = low
+        yield data.iloc[start:end]
+        start = end
+
+class AdaptiveBatcher:
+    """
+    insert_feature_values için ölçülen batch süresine göre batch boyutunu ayarlar
+
+    Her batch'ten sonra record() ile süre bildirilir. Batch'ler hedef süreyi
+    aşmadıkça boyut büyütülür. Büyütme hedef süreyi aştırdı veya satır/saniye
+    verimini düşürdüyse önceki boyuta dönülür ve aşılan boyut bir süre tavan
+    olarak kullanılır; büyütme olmadan aşılan hedefte boyut orantılı küçülür.
+    Sunucu hatalarında boyut yarıya iner; parametre sınırı hatasında
+    parametre sınırı da düşürülür.
+    Dilimler param_limited_batches ile parametre sınırına göre kesilir.
+    Birden fazla thread'den kullanılabilir.
+    """
+
+    GROWTH = 1.25
+    SHRINK_ON_ERROR = 0.5
+    SAMPLE_BATCHES = 3
+    CEILING_BATCHES = 100
+
+    def __init__(self, initial_size: int = 1000, min_size: int = 100, max_size: int = 20000,
+                 target_seconds: float = None, max_params: int = None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds or BATCH_TARGET_SECONDS
+        self.max_params = max_params or BATCH_MAX_PARAMS
+        self._size = float(min(max(initial_size, min_size), max_size))
+        self._good_size = self._size
+        self._ceiling = None
+        self._batches_since_ceiling = 0
+        self._last_throughput = None
+        self._grew = False
+        self._reset_window()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return int(self._size)
+
+    def batches(self, data: pd.DataFrame):
+        """Veriyi güncel boyuta ve parametre sınırına göre dilimler halinde üretir"""
+        return param_limited_batches(data, lambda: self.size, self.max_params)
+
+    def _resize(self, size):
+        self._size = min(max(size, self.min_size), self.max_size)
+
+    def record(self, rows: int, seconds: float):
+        """Tamamlanan bir batch'in satır sayısını ve süresini bildirir"""
+        if rows <= 0:
+            return
+        with self._lock:
+            previous = self.size
+            if seconds > self.target_seconds:
+                if self._grew:
+                    # Son büyütme hedef süreyi aştırdı: önceki boyuta dön, bu boyutu tavan olarak hatırla
+                    self._set_ceiling()
+                else:
+                    self._resize(self._size * max(self.SHRINK_ON_ERROR, self.target_seconds / seconds))
+                    self._good_size = self._size
+                self._reset_window()
+            else:
+                # Verim, gürültü azalsın diye aynı boyuttaki SAMPLE_BATCHES batch üzerinden ölçülür
+                self._window_rows += rows
+                self._window_seconds += seconds
+                self._window_batches += 1
+                if self._window_batches >= self.SAMPLE_BATCHES:
+                    throughput = self._window_rows / max(self._window_seconds, 1e-6)
+                    self._reset_window()
+                    if self._grew and self._last_throughput is not None and throughput < self._last_throughput * 0.97:
+                        # Büyütme verimi düşürdü
+                        self._set_ceiling()
+                    else:
+                        self._last_throughput = throughput
+                        self._grow()
+            # Koşullar değişmiş olabilir; tavan bir süre sonra unutulur ve yeniden denenir
+            self._batches_since_ceiling += 1
+            if self._batches_since_ceiling >= self.CEILING_BATCHES:
+                self._ceiling = None
+        if self.size != previous:
+            logger.debug("Batch boyutu %s -> %s (%s satır, %.3f sn)", previous, self.size, rows, seconds)
+
+    def _grow(self):
+        self._good_size = self._size
+        size = self._size * self.GROWTH
+        if self._ceiling is not None:
+            if self._ceiling - self._size <= self._size * 0.05:
+                # Tavana yeterince yakın, boyut sabit kalır
+                self._grew = False
+                return
+            # Tavana yaklaşırken adımlar küçülür
+            size = min(size, (self._size + self._ceiling) / 2)
+        previous = self._size
+        self._resize(size)
+        self._grew = self._size > previous
+
+    def _set_ceiling(self):
+        self._ceiling = self._size
+        self._batches_since_ceiling = 0
+        self._resize(self._good_size)
+        self._grew = False
+
+    def _reset_window(self):
+        self._window_rows = 0
+        self._window_seconds = 0.0
+        self._window_batches = 0
+
+    def record_error(self, error: Exception):
+        """Başarısız bir batch'i bildirir; boyutu (ve parametre sınırı hatasında sınırı) düşürür"""
+        with self._lock:
+            self._resize(self._size * self.SHRINK_ON_ERROR)
+            self._good_size = self._size
+            self._grew = False
+            self._last_throughput = None
+            self._reset_window()
+            message = str(error).lower()
+            if "2100" in message or "too many parameters" in message:
+                self.max_params = max(int(self.max_params * 0.75), 3)
+        logger.warning("Batch hatası sonrası batch boyutu %s, parametre sınırı %s", self.size, self.max_params)
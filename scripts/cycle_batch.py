@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+
+class CycleBatch:
+    """Bir günün cycle verilerini sütunsal (CSR) düzende tutar
+
+    Her kanal (Pressure1..4, Temp1..4) için tüm cycle'ların örnekleri tek bir
+    bitişik float32 tampon içinde saklanır. Cycle i'nin örnekleri
+    values[offsets[i]:offsets[i + 1]] aralığındadır. Cycle'da bulunmayan
+    kanallar için uzunluk 0'dır ve present maskesi False olur.
+    """
+
+    def __init__(self, cycle_ids, channels):
+        """
+        Args:
+            cycle_ids (list): Sıralı cycle id listesi (dosya adındaki string id'ler)
+            channels (dict): kanal adı -> (values, offsets, present)
+        """
+        self.cycle_ids = list(cycle_ids)
+        self.channels = channels
+        self._positions = {cycle_id: i for i, cycle_id in enumerate(self.cycle_ids)}
+
+    @classmethod
+    def from_dict(cls, merged_data):
+        """{cycle_id: {kanal: dizi}} sözlüğünden CycleBatch oluşturur"""
+        cycle_ids = sorted(merged_data)
+
+        # Kanal sırası DataFrame.from_dict ile aynı olsun diye ilk görülme sırası korunur
+        columns = []
+        for cycle_id in merged_data:
+            for column_name in merged_data[cycle_id]:
+                if column_name not in columns:
+                    columns.append(column_name)
+
+        channels = {}
+        for column_name in columns:
+            arrays = [merged_data[cycle_id].get(column_name) for cycle_id in cycle_ids]
+            present = np.array([a is not None for a in arrays], dtype=bool)
+            lengths = np.array([0 if a is None else len(a) for a in arrays], dtype=np.int64)
+            offsets = np.zeros(len(cycle_ids) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            values = np.empty(offsets[-1], dtype=np.float32)
+            for i, a in enumerate(arrays):
+                if a is not None:
+                    values[offsets[i]:offsets[i + 1]] = a
+            channels[column_name] = (values, offsets, present)
+        return cls(cycle_ids, channels)
+
+    @classmethod
+    def concat(cls, batches):
+        """Birden fazla CycleBatch'i cycle id sırasına göre birleştirir"""
+        merged_data = {}
+        for batch in batches:
+            for cycle_id in batch.cycle_ids:
+                merged_data[cycle_id] = {
+                    column_name: batch.get(cycle_id, column_name)
+                    for column_name in batch.columns
+                    if batch.has(cycle_id, column_name)
+                }
+        return cls.from_dict(merged_data)
+
+    def __len__(self):
+        return len(self.cycle_ids)
+
+    def __contains__(self, cycle_id):
+        return cycle_id in self._positions
+
+    @property
+    def columns(self):
+        return list(self.channels)
+
+    @property
+    def index(self):
+        return pd.Index(self.cycle_ids, name="id")
+
+    @property
+    def nbytes(self):
+        """Tamponların toplam bellek kullanımı (byte)"""
+        return sum(values.nbytes + offsets.nbytes + present.nbytes
+                   for values, offsets, present in self.channels.values())
+
+    def has(self, cycle_id, column_name):
+        """Cycle'da ilgili kanalın bulunup bulunmadığını döndürür"""
+        if column_name not in self.channels:
+            return False
+        return bool(self.channels[column_name][2][self._positions[cycle_id]])
+
+    def get(self, cycle_id, column_name):
+        """Bir cycle'ın kanal verisini kopyasız görünüm (view) olarak döndürür"""
+        values, offsets, _ = self.channels[column_name]
+        i = self._positions[cycle_id]
+        return values[offsets[i]:offsets[i + 1]]
+
+    def lengths(self, column_name):
+        """Kanaldaki her cycle'ın örnek sayısını döndürür"""
+        return np.diff(self.channels[column_name][1])
+
+    def channel(self, column_name):
+        """Kanaldaki cycle'ları sırayla döndürür; eksik kanallar için np.nan verir"""
+        values, offsets, present = self.channels[column_name]
+        return [values[offsets[i]:offsets[i + 1]] if present[i] else np.nan
+                for i in range(len(self.cycle_ids))]
+
+    def select(self, cycle_ids):
+        """Verilen cycle id'lerinden oluşan yeni bir CycleBatch döndürür"""
+        wanted = set(cycle_ids)
+        return CycleBatch.from_dict({
+            cycle_id: {
+                column_name: self.get(cycle_id, column_name)
+                for column_name in self.columns
+                if self.has(cycle_id, column_name)
+            }
+            for cycle_id in self.cycle_ids if cycle_id in wanted
+        })
+
+    def to_dataframe(self):
+        """Eski DataFrame formatına (hücre başına dizi) dönüştürür"""
+        df = pd.DataFrame(
+            {column_name: pd.Series(self.channel(column_name), index=self.cycle_ids, dtype=object)
+             for column_name in self.columns},
+            index=self.cycle_ids,
+        )
+        df.index.name = "id"
+        return df
@@ -0,0 +1,196 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+import numpy as np
+from collections import namedtuple
+from scripts.cycle_batch import CycleBatch
+
+# Sıkıştırılmış tarih klasörünün tek dosyası
+PACK_FILE_NAME = "cycles.pack"
+
+PACK_MAGIC = b"CYCPACK1"
+PACK_ALIGN = 64
+PACK_COMPRESSIONS = ("none", "zlib")
+
+# Pack içindeki tek bir cycle kanalına referans (dosya yolu yerine kullanılır)
+PackRef = namedtuple('PackRef', ['pack', 'cycle_id', 'channel'])
+
+def _align(f):
+    """Sonraki bloğu PACK_ALIGN sınırına hizalar (mmap'ten kopyasız okuma için)"""
+    padding = -f.tell() % PACK_ALIGN
+    if padding:
+        f.write(b"\0" * padding)
+
+def _write_block(f, data: bytes):
+    _align(f)
+    position = f.tell()
+    f.write(data)
+    return [position, len(data)]
+
+def write_pack(path, batch: CycleBatch, files: dict, compression: str = "none", chunk_cycles: int = 256):
+    """
+    CycleBatch'i tek bir pack dosyasına yazar
+
+    Düzen: magic | kanal blokları | header JSON | header uzunluğu (uint64) | magic.
+    Her kanal için offsets (int64) ve present (uint8) dizileri ile değerler
+    saklanır; zlib ile değerler chunk_cycles'lık cycle parçaları halinde ayrı
+    ayrı sıkıştırılır.
+    Dosya geçici bir dosyaya yazılıp atomik olarak yerine konur.
+
+    Args:
+        path (str): Pack dosya yolu
+        batch (CycleBatch): Paketlenecek cycle'lar
+        files (dict): Paketlenen kaynak dosyalar, göreli yol -> [boyut, mtime_ns]
+        compression (str): "none" veya "zlib"
+        chunk_cycles (int): Parça başına cycle sayısı
+    """
+    if compression not in PACK_COMPRESSIONS:
+        raise ValueError(f"Geçersiz sıkıştırma: {compression}")
+    n = len(batch)
+    if compression == "none":
+        # Sıkıştırma yoksa kanal tek blokta tutulur, böylece tamamı kopyasız okunur
+        chunk_cycles = max(n, 1)
+    header = {
+        "format": 1,
+        "compression": compression,
+        "chunk_cycles": chunk_cycles,
+        "cycle_ids": batch.cycle_ids,
+        "files": files,
+        "channels": [],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PACK_MAGIC)
+        for column_name, (values, offsets, present) in batch.channels.items():
+            chunks = []
+            for start in range(0, n, chunk_cycles):
+                end = min(start + chunk_cycles, n)
+                data = np.ascontiguousarray(values[offsets[start]:offsets[end]], dtype='<f4').tobytes()
+                if compression == "zlib":
+                    data = zlib.compress(data)
+                chunks.append(_write_block(f, data))
+            header["channels"].append({
+                "name": column_name,
+                "offsets": _write_block(f, np.asarray(offsets, dtype='<i8').tobytes()),
+                "present": _write_block(f, np.asarray(present, dtype=np.uint8).tobytes()),
+                "chunks": chunks,
+            })
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        f.write(header_bytes)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(PACK_MAGIC)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class CyclePack:
+    """
+    Pack dosyasını memory map ile okur
+
+    Sıkıştırmasız pack'lerde kanal değerleri dosyadan kopyalanmadan NumPy
+    görünümü olarak döner; zlib'li pack'lerde yalnızca gereken parçalar açılır.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        trailer = len(PACK_MAGIC) + 8
+        if size < len(PACK_MAGIC) + trailer or self._mmap[:len(PACK_MAGIC)] != PACK_MAGIC or self._mmap[-len(PACK_MAGIC):] != PACK_MAGIC:
+            raise ValueError(f"Geçersiz pack dosyası: {path}")
+        header_length = struct.unpack('<Q', self._mmap[size - trailer:size - len(PACK_MAGIC)])[0]
+        header_start = size - trailer - header_length
+        header = json.loads(self._mmap[header_start:size - trailer].decode('utf-8'))
+
+        self.compression = header["compression"]
+        self.chunk_cycles = header["chunk_cycles"]
+        self.cycle_ids = header["cycle_ids"]
+        self.files = header["files"]
+        self._positions = {cycle_id: i for i, cycle_id in enumerate(self.cycle_ids)}
+        self._channels = {}
+        for channel in header["channels"]:
+            offsets = self._array(channel["offsets"], '<i8')
+            present = self._array(channel["present"], np.uint8).view(bool)
+            self._channels[channel["name"]] = (channel["chunks"], offsets, present)
+        # zlib'li pack'te son açılan parça kanal başına saklanır (sıralı okumalar için)
+        self._last_chunk = {}
+
+    def _array(self, block, dtype):
+        position, nbytes = block
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._mmap, dtype=dtype, count=nbytes // dtype.itemsize, offset=position)
+
+    def __len__(self):
+        return len(self.cycle_ids)
+
+    def __contains__(self, cycle_id):
+        return cycle_id in self._positions
+
+    @property
+    def columns(self):
+        return list(self._channels)
+
+    def _chunk_values(self, column_name, k):
+        """Kanalın k. parçasının değerlerini döndürür"""
+        chunks = self._channels[column_name][0]
+        if self.compression == "none":
+            return self._array(chunks[k], '<f4')
+        cached = self._last_chunk.get(column_name)
+        if cached is not None and cached[0] == k:
+            return cached[1]
+        position, nbytes = chunks[k]
+        values = np.frombuffer(zlib.decompress(self._mmap[position:position + nbytes]), dtype='<f4')
+        self._last_chunk[column_name] = (k, values)
+        return values
+
+    def has(self, cycle_id, column_name):
+        if column_name not in self._channels:
+            return False
+        return bool(self._channels[column_name][2][self._positions[cycle_id]])
+
+    def get(self, cycle_id, column_name):
+        """Bir cycle'ın kanal verisini döndürür"""
+        _, offsets, _ = self._channels[column_name]
+        i = self._positions[cycle_id]
+        k = i // self.chunk_cycles
+        base = offsets[k * self.chunk_cycles]
+        return self._chunk_values(column_name, k)[offsets[i] - base:offsets[i + 1] - base]
+
+    def refs(self, cycle_ids=None):
+        """{cycle id: {kanal: PackRef}} döndürür (scan_cycle_files ile aynı yapı)"""
+        result = {}
+        for cycle_id in self.cycle_ids:
+            if cycle_ids is not None and cycle_id not in cycle_ids:
+                continue
+            result[cycle_id] = {column_name: PackRef(self, cycle_id, column_name)
+                                for column_name in self.columns if self.has(cycle_id, column_name)}
+        return result
+
+    def read(self, cycle_ids=None) -> CycleBatch:
+        """Pack'teki (veya yalnızca cycle_ids'deki) cycle'ları CycleBatch olarak döndürür"""
+        if cycle_ids is None:
+            channels = {}
+            for column_name, (chunks, offsets, present) in self._channels.items():
+                if len(chunks) == 1:
+                    values = self._chunk_values(column_name, 0)
+                elif chunks:
+                    values = np.concatenate([self._chunk_values(column_name, k) for k in range(len(chunks))])
+                else:
+                    values = np.empty(0, dtype=np.float32)
+                channels[column_name] = (values, offsets, present)
+            return CycleBatch(self.cycle_ids, channels)
+        return CycleBatch.from_dict({
+            cycle_id: {column_name: self.get(cycle_id, column_name)
+                       for column_name in self.columns if self.has(cycle_id, column_name)}
+            for cycle_id in self.cycle_ids if cycle_id in cycle_ids
+        })
+
+def open_day_pack(day_folder_path):
+    """Tarih klasöründe pack dosyası varsa CyclePack, yoksa None döndürür"""
+    path = os.path.join(day_folder_path, PACK_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    return CyclePack(path)
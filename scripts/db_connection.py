@@ -3,18 +3,26 @@ import pyodbc
 import sqlite3
 from dotenv import load_dotenv
 import pandas as pd
+import numpy as np
 import time
 from typing import Optional, Any
 import traceback
 from scripts.logger import Logger
+from scripts.metrics import Metrics
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from contextlib import contextmanager
+import threading
 import urllib.parse
 
+# .env dosyasını yükle (LOG_LEVEL gibi ayarlar Logger oluşturulurken okunur)
+load_dotenv('db.config')
+
 # Logger'ı başlat
 logger = Logger()
 
-# .env dosyasını yükle
-load_dotenv('db.config')
+# Metrikleri başlat
+metrics = Metrics()
 
 class DatabaseError(Exception):
     """Veritabanı işlemleri için özel hata sınıfı"""
@@ -99,9 +107,299 @@ def handle_database_error(error: pyodbc.Error) -> tuple[str, Optional[int], Opti
         logger.error(f"Traceback: {traceback.format_exc()}")
         return "Beklenmeyen bir hata oluştu", None, str(e)
 
+# Process başına tek engine (connection pool) ve thread başına tek SQLite bağlantısı
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+_sqlite_local = threading.local()
+
+def _is_test() -> bool:
+    return os.getenv('IS_TEST', 'false').lower() == 'true'
+
+def odbc_connection_string() -> str:
+    """db.config'teki SQL Server bağlantı bilgilerinden ODBC bağlantı cümlesini oluşturur"""
+    return (
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={os.getenv('DB_SERVER')};"
+        f"DATABASE={os.getenv('DB_NAME')};"
+        f"UID={os.getenv('DB_USER')};"
+        f"PWD={os.getenv('DB_PASSWORD')}"
+    )
+
+def get_engine():
+    """
+    SQL Server için process genelinde paylaşılan SQLAlchemy engine'i döndürür
+
+    Engine ilk çağrıda oluşturulur ve connection pool'u ile birlikte yeniden
+    kullanılır. Fork ile oluşturulan worker process'ler üst process'in
+    bağlantılarını paylaşmaz; kendi engine'lerini oluştururlar.
+
+    Ayarlar (db.config):
+        DB_POOL_SIZE (int): Havuzda tutulan bağlantı sayısı (varsayılan: 5)
+        DB_POOL_MAX_OVERFLOW (int): Havuz dolunca açılabilecek ek bağlantı (varsayılan: 10)
+        DB_POOL_PRE_PING (bool): Bağlantıyı kullanmadan önce kontrol et (varsayılan: true)
+        DB_POOL_RECYCLE (int): Bağlantıların yenilenme süresi, saniye (varsayılan: 1800)
+    """
+    global _engine, _engine_pid
+    with _engine_lock:
+        if _engine is not None and _engine_pid != os.getpid():
+            # Üst process'ten kalan bağlantıları kapatmadan bırak
+            _engine.dispose(close=False)
+            _engine = None
+        if _engine is None:
+            _engine = create_engine(
+                f"mssql+pyodbc:///?odbc_connect={urllib.parse.quote_plus(odbc_connection_string())}",
+                pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
+                max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', '10')),
+                pool_pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+                pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800')),
+                # executemany çağrıları pyodbc'nin toplu parametre dizisi ile tek seferde gönderilir
+                fast_executemany=True,
+            )
+            _engine_pid = os.getpid()
+            logger.info("Veritabanı engine'i oluşturuldu")
+        return _engine
+
+def dispose_engine():
+    """Paylaşılan engine'i ve SQLite bağlantısını kapatır"""
+    global _engine, _engine_pid
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            _engine_pid = None
+    conn = getattr(_sqlite_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _sqlite_local.conn = None
+
+def get_sqlite_connection() -> sqlite3.Connection:
+    """Test ortamı için thread başına yeniden kullanılan SQLite bağlantısını döndürür (SQLITE_PATH, varsayılan: test.db)"""
+    conn = getattr(_sqlite_local, 'conn', None)
+    if conn is None or getattr(_sqlite_local, 'pid', None) != os.getpid():
+        conn = sqlite3.connect(os.getenv('SQLITE_PATH', 'test.db'))
+        _sqlite_local.conn = conn
+        _sqlite_local.pid = os.getpid()
+    return conn
+
+def _to_named_params(query: str, params: Any):
+    """? placeholder'larını :param1, :param2 şeklinde değiştirir"""
+    if not isinstance(params, (tuple, list)):
+        return query, params
+    param_dict = {}
+    modified_query = query
+    for i, param in enumerate(params):
+        param_name = f"param{i+1}"
+        param_dict[param_name] = param
+        modified_query = modified_query.replace('?', f':{param_name}', 1)
+    return modified_query, param_dict
+
+def _count_statement(params: Optional[Any], many: bool):
+    """Veritabanına gönderilen sorgu (round trip) ve executemany satır sayısını metriklere ekler"""
+    metrics.inc("sql_statements")
+    if many and params:
+        metrics.inc("sql_rows", len(params))
+
+def _run_sqlite(conn: sqlite3.Connection, query: str, params: Optional[Any], fetch: bool, many: bool):
+    """Sorguyu verilen SQLite bağlantısında çalıştırır (commit yapmaz)"""
+    _count_statement(params, many)
+    if fetch:
+        return pd.read_sql_query(query, conn, params=params)
+    cursor = conn.cursor()
+    try:
+        if params:
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+    finally:
+        cursor.close()
+    return True
+
+def _run_sqlalchemy(conn, query: str, params: Optional[Any], fetch: bool, many: bool):
+    """Sorguyu verilen SQLAlchemy bağlantısında çalıştırır (commit yapmaz)"""
+    _count_statement(params, many)
+    if fetch:
+        # Fetch işlemi için pandas ile SQLAlchemy connection kullan
+        if params:
+            modified_query, param_dict = _to_named_params(query, params)
+            return pd.read_sql(text(modified_query), conn, params=param_dict)
+        return pd.read_sql(text(query), conn)
+
+    if params:
+        if many:
+            # Çoklu kayıt işlemi: tek executemany çağrısı (fast_executemany)
+            param_list = list(params)
+            modified_query, _ = _to_named_params(query, param_list[0])
+            conn.execute(text(modified_query), [_to_named_params(query, param_set)[1] for param_set in param_list])
+        else:
+            # Tek kayıt işlemi
+            modified_query, param_dict = _to_named_params(query, params)
+            conn.execute(text(modified_query), param_dict)
+    else:
+        conn.execute(text(query))
+    return True
+
+def _run_typed_executemany(conn, query: str, rows: list, input_sizes: list):
+    """
+    executemany'yi parametre tipleri önceden bildirilmiş bir pyodbc cursor'ı ile çalıştırır (commit yapmaz)
+
+    fast_executemany, tipler verilmezse sp_describe_undeclared_parameters ile
+    sunucuya sorar; bu sorgu oturumun yerel geçici (#) tablolarını göremediği
+    için "Invalid object name" hatası verir. setinputsizes ile tipler
+    bildirildiğinde sunucuya sorulmaz.
+    """
+    _count_statement(rows, True)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.fast_executemany = True
+        cursor.setinputsizes(input_sizes)
+        cursor.executemany(query, rows)
+    finally:
+        cursor.close()
+    return True
+
+def to_db_rows(data: Any, columns: Optional[list] = None):
+    """
+    DataFrame, sütun sözlüğü (ad -> NumPy dizisi) veya satır listesini
+    DBAPI'nin kabul ettiği tuple listesine dönüştürür
+
+    NumPy tipleri Python tiplerine çevrilir, NaN değerler NULL (None) olur.
+
+    Returns:
+        tuple: (sütun adları, satır listesi)
+    """
+    if isinstance(data, pd.DataFrame):
+        columns = list(data.columns) if columns is None else columns
+        data = {col: data[col].to_numpy() for col in columns}
+    if isinstance(data, dict):
+        columns = list(data) if columns is None else columns
+        column_values = []
+        for col in columns:
+            values = np.asarray(data[col])
+            if values.dtype.kind == 'f':
+                values = values.astype(object)
+                values[pd.isna(values)] = None
+            column_values.append(values.tolist())
+        return columns, list(zip(*column_values))
+    return columns, [tuple(row) for row in data]
+
+def bulk_insert(table: str, data: Any, columns: Optional[list] = None, chunk_size: int = 10000, session: Optional["Session"] = None,
+                input_sizes: Optional[list] = None):
+    """
+    Kayıtları tabloya toplu olarak ekler
+
+    SQL Server'da pyodbc fast_executemany ile her parça tek round trip'te
+    gönderilir. NumPy/pandas sütunları doğrudan verilebilir.
+
+    Args:
+        table (str): Tablo adı
+        data: DataFrame, sütun sözlüğü (ad -> dizi) veya satır (tuple) listesi
+        columns (list, optional): Sütun adları (satır listesi verildiğinde zorunlu)
+        chunk_size (int): Tek executemany çağrısındaki satır sayısı
+        session (Session, optional): Verilirse aynı bağlantı/transaction kullanılır
+        input_sizes (list, optional): Sütunların pyodbc tipleri, ör. [(pyodbc.SQL_INTEGER, 0, 0)];
+            SQL Server'da yerel geçici (#) tabloya yazarken gerekli (session ile kullanılır)
+
+    Returns:
+        int: Eklenen satır sayısı
+    """
+    columns, rows = to_db_rows(data, columns)
+    if not rows:
+        return 0
+    if not columns:
+        raise ValueError("bulk_insert için sütun adları gerekli")
+
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        if session is not None:
+            session.execute(query, chunk, many=True, input_sizes=input_sizes)
+        else:
+            execute_query(query, chunk, many=True)
+    logger.debug("%s tablosuna %s satır toplu eklendi", table, len(rows))
+    return len(rows)
+
+def _unwrap_error(error: Exception) -> Exception:
+    """SQLAlchemy'nin sardığı DBAPI (pyodbc) hatasını döndürür"""
+    if isinstance(error, DBAPIError) and error.orig is not None:
+        return error.orig
+    return error
+
+def _is_connection_error(error_message: str) -> bool:
+    return any(err in error_message.lower() for err in ["timeout", "connection", "authentication", "server not found"])
+
+class Session:
+    """
+    Tek bağlantı ve tek transaction üzerinde birden fazla sorgu çalıştırır
+
+    transaction() ile oluşturulur; blok hatasız biterse commit, hata olursa
+    rollback yapılır.
+    """
+
+    def __init__(self, conn, is_test: bool):
+        self.conn = conn
+        self.is_test = is_test
+
+    def execute(self, query: str, params: Optional[Any] = None, many: bool = False, input_sizes: Optional[list] = None):
+        """INSERT/UPDATE/DDL sorgusunu çalıştırır (input_sizes: bkz. _run_typed_executemany)"""
+        return self._run(query, params, fetch=False, many=many, input_sizes=input_sizes)
+
+    def fetch(self, query: str, params: Optional[Any] = None) -> pd.DataFrame:
+        """SELECT sorgusunu çalıştırır ve sonucu DataFrame olarak döndürür"""
+        return self._run(query, params, fetch=True, many=False)
+
+    def bulk_insert(self, table: str, data: Any, columns: Optional[list] = None, chunk_size: int = 10000,
+                    input_sizes: Optional[list] = None) -> int:
+        """Kayıtları bu transaction içinde toplu olarak ekler (bkz. bulk_insert)"""
+        return bulk_insert(table, data, columns, chunk_size, session=self, input_sizes=input_sizes)
+
+    def _run(self, query: str, params: Optional[Any], fetch: bool, many: bool, input_sizes: Optional[list] = None):
+        try:
+            if self.is_test:
+                return _run_sqlite(self.conn, query, params, fetch, many)
+            if many and input_sizes and params:
+                return _run_typed_executemany(self.conn, query, list(params), input_sizes)
+            return _run_sqlalchemy(self.conn, query, params, fetch, many)
+        except sqlite3.Error as e:
+            logger.error("SQLite sorgusu çalıştırılırken hata oluştu", e)
+            raise DatabaseError(f"SQLite hatası: {str(e)}")
+        except (pyodbc.Error, DBAPIError) as e:
+            error_message, error_code, details = handle_database_error(_unwrap_error(e))
+            logger.error(f"Sorgu hatası: {error_message}")
+            if _is_connection_error(error_message):
+                raise ConnectionError(error_message, error_code, details)
+            raise QueryError(error_message, query, params, error_code)
+
+@contextmanager
+def transaction():
+    """
+    Birden fazla sorguyu tek bağlantı ve tek transaction içinde çalıştırır
+
+    Örnek:
+        with transaction() as session:
+            session.execute("INSERT ...", params)
+            df = session.fetch("SELECT ...")
+    """
+    if _is_test():
+        conn = get_sqlite_connection()
+        try:
+            yield Session(conn, True)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    else:
+        with get_engine().begin() as conn:
+            yield Session(conn, False)
+
 def execute_query(query: str, params: Optional[Any] = None, fetch: bool = False, many: bool = False, max_retries: int = 3, retry_delay: int = 1):
     """
     SQL sorgusunu çalıştırır, bağlantı hatası durumunda yeniden dener
+
+    Bağlantılar paylaşılan connection pool'dan alınır (bkz. get_engine).
     
     Args:
         query (str): SQL sorgusu
@@ -118,107 +416,38 @@ def execute_query(query: str, params: Optional[Any] = None, fetch: bool = False,
         ConnectionError: Bağlantı hataları durumunda
         QueryError: Sorgu hataları durumunda
     """
-    is_test = os.getenv('IS_TEST', 'false').lower() == 'true'
-    
-    if is_test:
+    if _is_test():
+        conn = get_sqlite_connection()
         try:
-            conn = sqlite3.connect('test.db')
-            if fetch:
-                df = pd.read_sql_query(query, conn, params=params)
-                conn.close()
-                return df
-            else:
-                cursor = conn.cursor()
-                if params:
-                    if many:
-                        cursor.executemany(query, params)
-                    else:
-                        cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
+            result = _run_sqlite(conn, query, params, fetch, many)
+            if not fetch:
                 conn.commit()
-                cursor.close()
-                conn.close()
-                return True
+            return result
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error("SQLite sorgusu çalıştırılırken hata oluştu", e)
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise DatabaseError(f"SQLite hatası: {str(e)}")
     else:
         retry_count = 0
-        last_error = None
 
         while retry_count < max_retries:
             try:
-                connection_string = (
-                    f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                    f"SERVER={os.getenv('DB_SERVER')};"
-                    f"DATABASE={os.getenv('DB_NAME')};"
-                    f"UID={os.getenv('DB_USER')};"
-                    f"PWD={os.getenv('DB_PASSWORD')}"
-                )
-                engine = create_engine(f"mssql+pyodbc:///?odbc_connect={urllib.parse.quote_plus(connection_string)}")
-                
+                engine = get_engine()
                 if fetch:
-                    # Fetch işlemi için pandas ile SQLAlchemy engine kullan
-                    if params:
-                        # Parametreleri dictionary formatına çevir
-                        if isinstance(params, (tuple, list)):
-                            # ? placeholder'larını :param1, :param2 şeklinde değiştir
-                            param_dict = {}
-                            modified_query = query
-                            for i, param in enumerate(params):
-                                param_name = f"param{i+1}"
-                                param_dict[param_name] = param
-                                modified_query = modified_query.replace('?', f':{param_name}', 1)
-                            df = pd.read_sql(text(modified_query), engine, params=param_dict)
-                        else:
-                            df = pd.read_sql(text(query), engine, params=params)
-                    else:
-                        df = pd.read_sql(text(query), engine)
-                    return df
-                else:
-                    # Insert/Update işlemleri için SQLAlchemy connection kullan
                     with engine.connect() as conn:
-                        if params:
-                            if many:
-                                # Çoklu kayıt işlemi
-                                for param_set in params:
-                                    if isinstance(param_set, (tuple, list)):
-                                        # ? placeholder'larını :param1, :param2 şeklinde değiştir
-                                        param_dict = {}
-                                        modified_query = query
-                                        for i, param in enumerate(param_set):
-                                            param_name = f"param{i+1}"
-                                            param_dict[param_name] = param
-                                            modified_query = modified_query.replace('?', f':{param_name}', 1)
-                                        conn.execute(text(modified_query), param_dict)
-                                    else:
-                                        conn.execute(text(query), param_set)
-                            else:
-                                # Tek kayıt işlemi
-                                if isinstance(params, (tuple, list)):
-                                    # ? placeholder'larını :param1, :param2 şeklinde değiştir
-                                    param_dict = {}
-                                    modified_query = query
-                                    for i, param in enumerate(params):
-                                        param_name = f"param{i+1}"
-                                        param_dict[param_name] = param
-                                        modified_query = modified_query.replace('?', f':{param_name}', 1)
-                                    conn.execute(text(modified_query), param_dict)
-                                else:
-                                    conn.execute(text(query), params)
-                        else:
-                            conn.execute(text(query))
-                        conn.commit()
-                    return True
+                        return _run_sqlalchemy(conn, query, params, fetch, many)
+                # Insert/Update işlemleri tek transaction içinde yapılır
+                with engine.begin() as conn:
+                    return _run_sqlalchemy(conn, query, params, fetch, many)
                     
-            except pyodbc.Error as e:
-                error_message, error_code, details = handle_database_error(e)
+            except (pyodbc.Error, DBAPIError) as e:
+                error_message, error_code, details = handle_database_error(_unwrap_error(e))
                 retry_count += 1
                 
-                if any(err in error_message.lower() for err in ["timeout", "connection", "authentication", "server not found"]):
+                if _is_connection_error(error_message):
                     if retry_count < max_retries:
+                        metrics.inc("sql_retries")
                         logger.warning(f"Bağlantı hatası (Deneme {retry_count}/{max_retries}): {error_message}")
                         logger.warning(f"{retry_delay} saniye sonra yeniden deneniyor...")
                         time.sleep(retry_delay)
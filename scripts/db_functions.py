@@ -1,65 +1,149 @@
-from scripts.db_connection import execute_query
+from scripts.db_connection import execute_query, bulk_insert, to_db_rows, transaction
+import pyodbc
+from scripts.async_db import run_sync, run_query, bulk_insert_async, run_in_transaction, gather_limited
+from scripts.batching import AdaptiveBatcher, param_limited_batches
 import pandas as pd
+import numpy as np
 import traceback
 from scripts.logger import Logger
+from scripts.metrics import Metrics
 import os
+import time
+import threading
 # Logger'ı başlat
 logger = Logger()
+
+# Metrikleri başlat
+metrics = Metrics()
 extractor_version = os.getenv('EXTRACTOR_VERSION')
 if extractor_version is None:
     logger.error("EXTRACTOR_VERSION ortam değişkeni bulunamadı")
     raise Exception("EXTRACTOR_VERSION ortam değişkeni bulunamadı")
 
+# Process genelinde FEATURES_LOOKUP önbelleği (FEATURE_NAME -> FEATURE_ID)
+_feature_cache = None
+_feature_cache_lock = threading.Lock()
+
+# Tek INSERT'te kaydedilecek en fazla özellik sayısı (SQL Server 2100 parametre sınırı)
+FEATURE_REGISTER_CHUNK = 500
+
+# MERGE staging tablosu sütunlarının (CYCLE_ID, FEATURE_ID, FEATURE_VALUE) pyodbc tipleri
+_STAGE_INPUT_SIZES = [(pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_DOUBLE, 0, 0)]
+
+# batch_size=None ile kullanılan, process genelinde öğrenilen batch boyutu
+_batcher = AdaptiveBatcher()
+
+def _batches(data_with_id: pd.DataFrame, batch_size):
+    """batch_size verilmişse sabit boyutlu, None ise uyarlamalı dilimler (her ikisi de parametre sınırı içinde)"""
+    if batch_size is None:
+        return _batcher.batches(data_with_id)
+    return param_limited_batches(data_with_id, batch_size)
+
+def reset_feature_cache():
+    """Özellik önbelleğini temizler; sonraki çağrıda tablo yeniden okunur"""
+    global _feature_cache
+    with _feature_cache_lock:
+        _feature_cache = None
+
+def _register_features(session, names: list):
+    """Yeni özellikleri tek set tabanlı INSERT ile kaydeder ve id'lerini döndürür
+
+    FEATURE_ID'ler sunucuda MAX(FEATURE_ID) + ROW_NUMBER ile atomik olarak
+    verilir; SQL Server'da UPDLOCK/HOLDLOCK aynı anda çalışan process'lerin
+    aynı id'yi almasını engeller. Başka bir process'in eklediği adlar atlanır.
+    """
+    values = ', '.join(['(?, ?)'] * len(names))
+    params = [p for i, name in enumerate(names) for p in (i, name)]
+    if os.getenv('IS_TEST', 'false').lower() == 'true':
+        query = f"""
+            WITH V(ORD, FEATURE_NAME) AS (VALUES {values})
+            INSERT INTO FEATURES_LOOKUP (FEATURE_ID, FEATURE_NAME)
+            SELECT COALESCE((SELECT MAX(FEATURE_ID) FROM FEATURES_LOOKUP), 0) + ROW_NUMBER() OVER (ORDER BY V.ORD), V.FEATURE_NAME
+            FROM V
+            WHERE NOT EXISTS (SELECT 1 FROM FEATURES_LOOKUP F WHERE F.FEATURE_NAME = V.FEATURE_NAME)
+        """
+    else:
+        query = f"""
+            INSERT INTO FEATURES_LOOKUP (FEATURE_ID, FEATURE_NAME)
+            SELECT COALESCE((SELECT MAX(FEATURE_ID) FROM FEATURES_LOOKUP WITH (UPDLOCK, HOLDLOCK)), 0) + ROW_NUMBER() OVER (ORDER BY V.ORD), V.FEATURE_NAME
+            FROM (VALUES {values}) AS V(ORD, FEATURE_NAME)
+            WHERE NOT EXISTS (SELECT 1 FROM FEATURES_LOOKUP F WITH (UPDLOCK, HOLDLOCK) WHERE F.FEATURE_NAME = V.FEATURE_NAME)
+        """
+    session.execute(query, params)
+    return session.fetch(
+        "SELECT FEATURE_ID, FEATURE_NAME FROM FEATURES_LOOKUP WHERE FEATURE_NAME IN ({})".format(','.join(['?'] * len(names))),
+        tuple(names)
+    )
+
+@metrics.timed("insert_new_features")
 def insert_new_features(features_list: list):
-    """Yeni özellikleri veritabanına ekler"""
+    """Yeni özellikleri veritabanına ekler
+
+    FEATURES_LOOKUP process başına bir kez okunur ve önbellekte tutulur.
+    Önbellekte olmayan adlar tek bir set tabanlı INSERT ile kaydedilir;
+    tüm adlar biliniyorsa veritabanına gidilmez.
+
+    Returns:
+        pd.DataFrame: FEATURE_ID, FEATURE_NAME sütunlarıyla bilinen tüm özellikler
+    """
+    global _feature_cache
     try:
-        # check if the feature list is already in the database
-        feature_list_db = execute_query(f"SELECT FEATURE_ID,FEATURE_NAME FROM FEATURES_LOOKUP", fetch=True)
-        logger.info("Mevcut özellik listesi veritabanından alındı")
+        with _feature_cache_lock:
+            if _feature_cache is None:
+                feature_list_db = execute_query(f"SELECT FEATURE_ID,FEATURE_NAME FROM FEATURES_LOOKUP", fetch=True)
+                _feature_cache = dict(zip(feature_list_db['FEATURE_NAME'], feature_list_db['FEATURE_ID']))
+                logger.info("Mevcut özellik listesi veritabanından alındı")
 
-        # new features
-        new_features = [feature for feature in features_list if feature not in feature_list_db['FEATURE_NAME'].values]
-        
-        # insert new features
-        for feature in new_features:
-            try:
-                max_feature_id = execute_query("SELECT MAX(FEATURE_ID) as max_id FROM FEATURES_LOOKUP", fetch=True)['max_id'].iloc[0]
-                new_feature_id = 1 if pd.isna(max_feature_id) else max_feature_id + 1
-                execute_query(f"INSERT INTO FEATURES_LOOKUP (FEATURE_ID,FEATURE_NAME) VALUES (?,?)",(int(new_feature_id),feature))
-                logger.debug(f"Yeni özellik eklendi: {feature}")
-            except Exception as e:
-                logger.error(f"Özellik eklenirken hata oluştu: {feature}", e)
-                raise
+            # new features
+            new_features = [feature for feature in dict.fromkeys(features_list) if feature not in _feature_cache]
 
-        if len(new_features) > 0:
-            logger.info(f"Yeni özellikler eklendi: {new_features}")
-            feature_list_db = execute_query(f"SELECT FEATURE_ID,FEATURE_NAME FROM FEATURES_LOOKUP", fetch=True)
-        
-        return feature_list_db
+            # insert new features
+            if new_features:
+                try:
+                    for i in range(0, len(new_features), FEATURE_REGISTER_CHUNK):
+                        chunk = new_features[i:i + FEATURE_REGISTER_CHUNK]
+                        with transaction() as session:
+                            registered = _register_features(session, chunk)
+                        _feature_cache.update(zip(registered['FEATURE_NAME'], registered['FEATURE_ID']))
+                except Exception as e:
+                    logger.error(f"Özellikler eklenirken hata oluştu: {new_features}", e)
+                    raise
+                logger.info("Yeni özellikler eklendi: %s", new_features)
+
+            return pd.DataFrame({
+                'FEATURE_ID': list(_feature_cache.values()),
+                'FEATURE_NAME': list(_feature_cache.keys()),
+            })
     except Exception as e:
         logger.error("Özellik listesi işlenirken hata oluştu", e)
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
+@metrics.timed("format_data_with_id")
 def format_data_with_id(features: pd.DataFrame, feature_list_db: pd.DataFrame):
-    """Veriyi cycle_id, feature_id, feature_value formatına dönüştürür"""
+    """Veriyi cycle_id, feature_id, feature_value formatına dönüştürür
+
+    Geniş tablo satır sırasıyla (cycle -> özellik) uzun formata açılır;
+    özellik adları sözlük ile FEATURE_ID'ye eşlenir.
+    """
     try:
-        data_with_id = pd.DataFrame()
-        for index, row in features.iterrows():
-            for feature in features.columns:
-                try:
-                    feature_id = feature_list_db[feature_list_db['FEATURE_NAME'] == feature].FEATURE_ID.values[0]
-                    data_with_id = pd.concat([data_with_id, pd.DataFrame({
-                        'CYCLE_ID': [int(index)],
-                        'FEATURE_ID': [int(feature_id)],
-                        'FEATURE_VALUE': [float(row[feature])]
-                    })], ignore_index=True)
-                except IndexError as e:
-                    logger.error(f"Özellik ID'si bulunamadı: {feature}", e)
-                    raise
-                except Exception as e:
-                    logger.error(f"Veri formatlanırken hata oluştu: {feature}", e)
-                    raise
+        # Aynı ad birden fazla varsa ilk kayıt geçerli
+        lookup = feature_list_db.drop_duplicates('FEATURE_NAME', keep='first')
+        name_to_id = dict(zip(lookup['FEATURE_NAME'], lookup['FEATURE_ID']))
+
+        missing = [feature for feature in features.columns if feature not in name_to_id]
+        if missing:
+            error_msg = f"Özellik ID'si bulunamadı: {missing}"
+            logger.error(error_msg)
+            raise IndexError(error_msg)
+
+        n_rows, n_cols = features.shape
+        feature_ids = np.array([name_to_id[feature] for feature in features.columns], dtype='int64')
+        data_with_id = pd.DataFrame({
+            'CYCLE_ID': np.repeat(features.index.astype(int).to_numpy(dtype='int64'), n_cols),
+            'FEATURE_ID': np.tile(feature_ids, n_rows),
+            'FEATURE_VALUE': features.to_numpy(dtype=float).ravel(),
+        })
 
         logger.info(f"{len(data_with_id)} satır veri formatlandı")
         return data_with_id
@@ -68,90 +152,114 @@ def format_data_with_id(features: pd.DataFrame, feature_list_db: pd.DataFrame):
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
+def _existing_values_query(cycle_count: int, feature_count: int) -> str:
+    """Batch'teki (cycle, feature) çiftlerinin mevcut kayıtlarını getiren sorgu (parametreler: cycle id'ler, feature id'ler, station id)"""
+    return """
+        SELECT ID, CYCLE_ID, FEATURE_ID, STATION_ID, FEATURE_VALUE, EXTRACTOR_VERSION
+        FROM EXTRACTED_FEATURES 
+        WHERE CYCLE_ID IN ({}) AND FEATURE_ID IN ({}) AND STATION_ID = ?
+        """.format(
+            ','.join(['?'] * cycle_count),
+            ','.join(['?'] * feature_count)
+        )
+
+_UPDATE_FEATURE_VALUE_QUERY = """
+    UPDATE EXTRACTED_FEATURES 
+    SET FEATURE_VALUE = ?, EXTRACTOR_VERSION = ?
+    WHERE ID = ?
+    """
+
+def _batch_keys(batch: pd.DataFrame, station_id: int) -> tuple:
+    """Mevcut değer sorgusunun parametreleri"""
+    cycle_ids = tuple(int(x) for x in batch['CYCLE_ID'].unique())
+    feature_ids = tuple(int(x) for x in batch['FEATURE_ID'].unique())
+    return cycle_ids, feature_ids, (*cycle_ids, *feature_ids, int(station_id))
+
+def _split_batch(batch: pd.DataFrame, existing_values: pd.DataFrame, station_id: int):
+    """
+    Batch'i veritabanındaki mevcut değerlerle karşılaştırır
+
+    Returns:
+        tuple: (eklenecek kayıtlar sütun sözlüğü veya None, güncellenecek satırlar listesi)
+    """
+    # Mevcut değerleri batch ile eşleştir (aynı anahtar birden fazla varsa sonuncusu geçerli)
+    existing_values = existing_values.astype({'CYCLE_ID': 'int64', 'FEATURE_ID': 'int64'})
+    existing_values = existing_values.drop_duplicates(['CYCLE_ID', 'FEATURE_ID'], keep='last')
+    merged = batch.astype({'CYCLE_ID': 'int64', 'FEATURE_ID': 'int64'}).merge(
+        existing_values[['ID', 'CYCLE_ID', 'FEATURE_ID', 'FEATURE_VALUE', 'EXTRACTOR_VERSION']],
+        on=['CYCLE_ID', 'FEATURE_ID'], how='left', suffixes=('', '_DB')
+    )
+
+    # Eklenecek ve güncellenecek kayıtları ayır
+    is_new = merged['ID'].isna()
+    is_changed = ~is_new & (
+        (merged['FEATURE_VALUE'] != merged['FEATURE_VALUE_DB'])
+        | (merged['EXTRACTOR_VERSION'] != extractor_version)
+    )
+    to_insert = merged[is_new]
+    to_update = merged[is_changed]
+
+    insert_columns = None
+    if len(to_insert):
+        insert_columns = {
+            'CYCLE_ID': to_insert['CYCLE_ID'].to_numpy(),
+            'FEATURE_ID': to_insert['FEATURE_ID'].to_numpy(),
+            'FEATURE_VALUE': to_insert['FEATURE_VALUE'].to_numpy(dtype=float),
+            'STATION_ID': np.full(len(to_insert), int(station_id)),
+            'EXTRACTOR_VERSION': np.full(len(to_insert), extractor_version, dtype=object),
+        }
+    update_rows = []
+    if len(to_update):
+        _, update_rows = to_db_rows({
+            'FEATURE_VALUE': to_update['FEATURE_VALUE'].to_numpy(dtype=float),
+            'EXTRACTOR_VERSION': np.full(len(to_update), extractor_version, dtype=object),
+            'ID': to_update['ID'].to_numpy(dtype='int64'),
+        })
+    return insert_columns, update_rows
+
+@metrics.timed("insert_feature_values")
 def insert_feature_values(data_with_id: pd.DataFrame, station_id: int, batch_size: int = 1000):
-    """Özellik değerlerini veritabanına ekler veya günceller"""
+    """Özellik değerlerini veritabanına ekler veya günceller
+
+    batch_size None ise batch boyutu ölçülen batch sürelerine göre ayarlanır
+    (bkz. AdaptiveBatcher). Her iki durumda da batch'ler mevcut değer
+    sorgusu parametre sınırını aşmayacak şekilde kesilir.
+    """
     try:
-        total_batches = (len(data_with_id) + batch_size - 1) // batch_size
-        
-        for i in range(0, len(data_with_id), batch_size):
+        for number, batch in enumerate(_batches(data_with_id, batch_size), 1):
+            start = time.perf_counter()
             try:
-                batch = data_with_id.iloc[i:i+batch_size]
-                
                 # Mevcut değerleri toplu olarak kontrol et
-                cycle_ids = tuple(int(x) for x in batch['CYCLE_ID'].unique())
-                feature_ids = tuple(int(x) for x in batch['FEATURE_ID'].unique())
-                
+                cycle_ids, feature_ids, params = _batch_keys(batch, station_id)
                 existing_values = execute_query(
-                    """
-                    SELECT ID, CYCLE_ID, FEATURE_ID, STATION_ID, FEATURE_VALUE, EXTRACTOR_VERSION
-                    FROM EXTRACTED_FEATURES 
-                    WHERE CYCLE_ID IN ({}) AND FEATURE_ID IN ({}) AND STATION_ID = ?
-                    """.format(
-                        ','.join(['?'] * len(cycle_ids)),
-                        ','.join(['?'] * len(feature_ids))
-                    ),
-                    (*cycle_ids, *feature_ids, int(station_id)),
+                    _existing_values_query(len(cycle_ids), len(feature_ids)),
+                    params,
                     fetch=True
                 )
-                
-                # Mevcut değerleri dictionary'ye dönüştür
-                existing_dict = {
-                    (int(row['CYCLE_ID']), int(row['FEATURE_ID']),int(row['STATION_ID'])): (row['ID'], row['FEATURE_VALUE'], row['EXTRACTOR_VERSION'])
-                    for _, row in existing_values.iterrows()
-                }
-                
-                # Eklenecek ve güncellenecek kayıtları ayır
-                to_insert = []
-                to_update = []
-                
-                for _, row in batch.iterrows():
-                    key = (int(row['CYCLE_ID']), int(row['FEATURE_ID']),int(station_id))
-                    if key not in existing_dict:
-                        to_insert.append((
-                            int(row['CYCLE_ID']),
-                            int(row['FEATURE_ID']),
-                            float(row['FEATURE_VALUE']),
-                            int(station_id),
-                            extractor_version
-                        ))
-                    else:
-                        existing_id, existing_value, existing_version = existing_dict[key]
-                        if existing_value != row['FEATURE_VALUE'] or existing_version != extractor_version:
-                            to_update.append((
-                                float(row['FEATURE_VALUE']),
-                                extractor_version,
-                                existing_id
-                            ))
+                insert_columns, update_rows = _split_batch(batch, existing_values, station_id)
                 
                 # Toplu ekleme
-                if to_insert:
-                    execute_query(
-                        """
-                        INSERT INTO EXTRACTED_FEATURES (CYCLE_ID, FEATURE_ID, FEATURE_VALUE, STATION_ID, EXTRACTOR_VERSION)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        to_insert,
-                        many=True
-                    )
-                    logger.debug(f"{len(to_insert)} yeni kayıt eklendi")
+                if insert_columns is not None:
+                    inserted = bulk_insert("EXTRACTED_FEATURES", insert_columns)
+                    metrics.inc("rows_inserted", inserted)
+                    logger.debug("%s yeni kayıt eklendi", inserted)
                 
                 # Toplu güncelleme
-                if to_update:
-                    execute_query(
-                        """
-                        UPDATE EXTRACTED_FEATURES 
-                        SET FEATURE_VALUE = ?, EXTRACTOR_VERSION = ?
-                        WHERE ID = ?
-                        """,
-                        to_update,
-                        many=True
-                    )
-                    logger.debug(f"{len(to_update)} kayıt güncellendi")
+                if update_rows:
+                    execute_query(_UPDATE_FEATURE_VALUE_QUERY, update_rows, many=True)
+                    metrics.inc("rows_updated", len(update_rows))
+                    logger.debug("%s kayıt güncellendi", len(update_rows))
                 
-                logger.debug(f"Batch {i//batch_size + 1}/{total_batches} işlendi")
+                logger.debug("Batch %s işlendi (%s satır)", number, len(batch))
             except Exception as e:
-                logger.error(f"Batch {i//batch_size + 1}/{total_batches} işlenirken hata oluştu", e)
+                if batch_size is None:
+                    _batcher.record_error(e)
+                logger.error(f"Batch {number} işlenirken hata oluştu", e)
                 raise
+            seconds = time.perf_counter() - start
+            metrics.observe("insert_batch", seconds)
+            if batch_size is None:
+                _batcher.record(len(batch), seconds)
 
         logger.info(f"Toplam {len(data_with_id)} özellik değeri başarıyla işlendi")
         return True
@@ -159,7 +267,135 @@ def insert_feature_values(data_with_id: pd.DataFrame, station_id: int, batch_siz
         logger.error("Özellik değerleri işlenirken hata oluştu", e)
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
+
+async def _upsert_batch_async(conn, batch: pd.DataFrame, station_id: int):
+    """Tek batch'i verilen asenkron bağlantıda ekler/günceller; (eklenen, güncellenen) döndürür"""
+    cycle_ids, feature_ids, params = _batch_keys(batch, station_id)
+    existing_values = await run_query(conn, _existing_values_query(len(cycle_ids), len(feature_ids)), params, fetch=True)
+    insert_columns, update_rows = _split_batch(batch, existing_values, station_id)
+    inserted = 0
+    if insert_columns is not None:
+        inserted = await bulk_insert_async(conn, "EXTRACTED_FEATURES", insert_columns)
+    if update_rows:
+        await run_query(conn, _UPDATE_FEATURE_VALUE_QUERY, update_rows, many=True)
+    return inserted, len(update_rows)
+
+async def insert_feature_values_async(data_with_id: pd.DataFrame, station_id: int, batch_size: int = 1000, max_concurrency: int = None):
+    """
+    Özellik değerlerini asenkron engine ile, birden fazla batch'i aynı anda göndererek ekler veya günceller
+
+    Her batch havuzdan alınan ayrı bir bağlantıda ve kendi transaction'ında
+    yazılır; aynı anda en fazla max_concurrency (varsayılan:
+    ASYNC_DB_CONCURRENCY) batch gönderilir, böylece bağlantı gecikmesi
+    örtüşür. Aynı (cycle, feature) için sonuncu değer geçerli olacak şekilde
+    kayıtlar önceden tekilleştirilir; batch'ler ortak anahtar içermediği için
+    tamamlanma sırası sonucu değiştirmez. Bir batch hata verirse station-günün
+    bekleyen batch'leri iptal edilir ve hata yükseltilir; tamamlanan batch'ler
+    kalır (insert_feature_values ile aynı), gün tekrar işlendiğinde eksikler
+    yazılır.
+
+    batch_size None ise batch'ler station-gün başında uyarlamalı boyutla
+    kesilir; boyut sonraki station-günler için batch sürelerinden öğrenilir.
+    """
+    data = data_with_id.drop_duplicates(['CYCLE_ID', 'FEATURE_ID'], keep='last')
+    # Görevler baştan oluşturulduğu için dilimler de baştan kesilir
+    batches = list(_batches(data, batch_size))
+
+    async def write_batch(number, batch):
+        start = time.perf_counter()
+        try:
+            inserted, updated = await run_in_transaction(lambda conn: _upsert_batch_async(conn, batch, station_id))
+        except Exception as e:
+            if batch_size is None:
+                _batcher.record_error(e)
+            logger.error(f"Batch {number}/{len(batches)} işlenirken hata oluştu", e)
+            raise
+        seconds = time.perf_counter() - start
+        metrics.observe("insert_batch", seconds)
+        if batch_size is None:
+            _batcher.record(len(batch), seconds)
+        metrics.inc("rows_inserted", inserted)
+        metrics.inc("rows_updated", updated)
+        logger.debug("Batch %s/%s işlendi (%s yeni, %s güncellendi)", number, len(batches), inserted, updated)
+
+    await gather_limited((write_batch(number, batch) for number, batch in enumerate(batches, 1)), max_concurrency)
+    logger.info(f"Toplam {len(data)} özellik değeri eşzamanlı batch'lerle işlendi")
+    return True
+
+@metrics.timed("insert_feature_values_async")
+def insert_feature_values_concurrent(data_with_id: pd.DataFrame, station_id: int, batch_size: int = 1000, max_concurrency: int = None):
+    """insert_feature_values_async'i asenkron veritabanı thread'inde çalıştırır ve bitmesini bekler (senkron koddan kullanım için)"""
+    try:
+        return run_sync(insert_feature_values_async(data_with_id, station_id, batch_size, max_concurrency))
+    except Exception as e:
+        logger.error("Özellik değerleri eşzamanlı batch'lerle işlenirken hata oluştu", e)
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise
         
+@metrics.timed("merge_feature_values")
+def merge_feature_values(data_with_id: pd.DataFrame, station_id: int, chunk_size: int = 10000):
+    """Özellik değerlerini sunucu tarafında tek MERGE ile ekler veya günceller
+
+    Station-gün verisi tek transaction içinde geçici bir staging tablosuna
+    toplu olarak yüklenir, ardından EXTRACTED_FEATURES ile tek bir MERGE
+    çalıştırılır. Staging yüklemesinde parametre tipleri önceden bildirilir;
+    aksi halde fast_executemany geçici tabloyu göremez. Değeri veya EXTRACTOR_VERSION'ı değişen kayıtlar
+    güncellenir, olmayanlar eklenir. Yazma süresi tablodaki mevcut satır
+    sayısından bağımsızdır. Yalnızca SQL Server için.
+    """
+    try:
+        if len(data_with_id) == 0:
+            logger.info("Eklenecek özellik değeri yok")
+            return True
+
+        # Aynı (cycle, feature) birden fazla gelirse sonuncusu geçerli (MERGE kaynak satırları tekil olmalı)
+        stage = data_with_id.drop_duplicates(['CYCLE_ID', 'FEATURE_ID'], keep='last')
+
+        with transaction() as session:
+            session.execute("""
+                CREATE TABLE #EXTRACTED_FEATURES_STAGE (
+                    CYCLE_ID INT NOT NULL,
+                    FEATURE_ID INT NOT NULL,
+                    FEATURE_VALUE FLOAT NULL,
+                    PRIMARY KEY (CYCLE_ID, FEATURE_ID)
+                )
+            """)
+            session.bulk_insert("#EXTRACTED_FEATURES_STAGE", {
+                'CYCLE_ID': stage['CYCLE_ID'].to_numpy(dtype='int64'),
+                'FEATURE_ID': stage['FEATURE_ID'].to_numpy(dtype='int64'),
+                'FEATURE_VALUE': stage['FEATURE_VALUE'].to_numpy(dtype=float),
+            }, chunk_size=chunk_size, input_sizes=_STAGE_INPUT_SIZES)
+            logger.debug("%s kayıt staging tablosuna yüklendi", len(stage))
+
+            session.execute(
+                """
+                MERGE EXTRACTED_FEATURES WITH (HOLDLOCK) AS T
+                USING #EXTRACTED_FEATURES_STAGE AS S
+                ON T.CYCLE_ID = S.CYCLE_ID AND T.FEATURE_ID = S.FEATURE_ID AND T.STATION_ID = ?
+                WHEN MATCHED AND (
+                    T.FEATURE_VALUE <> S.FEATURE_VALUE
+                    OR (T.FEATURE_VALUE IS NULL AND S.FEATURE_VALUE IS NOT NULL)
+                    OR (T.FEATURE_VALUE IS NOT NULL AND S.FEATURE_VALUE IS NULL)
+                    OR T.EXTRACTOR_VERSION <> ?
+                    OR T.EXTRACTOR_VERSION IS NULL
+                ) THEN
+                    UPDATE SET T.FEATURE_VALUE = S.FEATURE_VALUE, T.EXTRACTOR_VERSION = ?
+                WHEN NOT MATCHED BY TARGET THEN
+                    INSERT (CYCLE_ID, FEATURE_ID, FEATURE_VALUE, STATION_ID, EXTRACTOR_VERSION)
+                    VALUES (S.CYCLE_ID, S.FEATURE_ID, S.FEATURE_VALUE, ?, ?);
+                """,
+                (int(station_id), extractor_version, extractor_version, int(station_id), extractor_version)
+            )
+            session.execute("DROP TABLE #EXTRACTED_FEATURES_STAGE")
+
+        metrics.inc("rows_merged", len(stage))
+        logger.info(f"Toplam {len(stage)} özellik değeri MERGE ile işlendi")
+        return True
+    except Exception as e:
+        logger.error("Özellik değerleri MERGE ile işlenirken hata oluştu", e)
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise
+
 def get_station_profile():
     """Station profile'ı veritabanından alır
     RETURN:
@@ -59,12 +59,12 @@ def insert_new_features(features_list: List[str]) -> Dict[str, int]:
             try:
                 cursor.execute("INSERT INTO feature_list (feature_name) VALUES (?)", (feature,))
                 feature_ids[feature] = cursor.lastrowid
-                logger.debug(f"Yeni özellik eklendi: {feature}")
+                logger.debug("Yeni özellik eklendi: %s", feature)
             except sqlite3.IntegrityError:
                 # Özellik zaten varsa ID'sini al
                 cursor.execute("SELECT id FROM feature_list WHERE feature_name = ?", (feature,))
                 feature_ids[feature] = cursor.fetchone()[0]
-                logger.debug(f"Mevcut özellik ID'si alındı: {feature}")
+                logger.debug("Mevcut özellik ID'si alındı: %s", feature)
         
         conn.commit()
         conn.close()
@@ -118,7 +118,7 @@ def insert_cycle_data(formatted_data: List[Dict[str, Any]], date: str):
                 existing_cycle = cursor.fetchone()
                 
                 if existing_cycle:
-                    logger.debug(f"Döngü {cycle['id']} zaten mevcut, atlanıyor")
+                    logger.debug("Döngü %s zaten mevcut, atlanıyor", cycle['id'])
                     continue
                 
                 # Cycle kaydını ekle
@@ -135,7 +135,7 @@ def insert_cycle_data(formatted_data: List[Dict[str, Any]], date: str):
                         (cycle_id, feature['feature_id'], feature['feature_value'])
                     )
                 
-                logger.debug(f"Döngü {cycle['id']} başarıyla eklendi")
+                logger.debug("Döngü %s başarıyla eklendi", cycle['id'])
             except sqlite3.Error as e:
                 logger.error(f"Döngü {cycle['id']} eklenirken hata oluştu", e)
                 raise
@@ -0,0 +1,88 @@
+import os
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from scripts.logger import Logger
+
+# Logger'ı başlat
+logger = Logger()
+
+# İşlenecek bir station-gün kaydı
+WorkItem = namedtuple('WorkItem', ['station_id', 'date'])
+
+DISCOVERY_MANIFEST = "discovery_manifest.json"
+
+def load_manifest(manifest_path: str = DISCOVERY_MANIFEST) -> dict:
+    """Önceki taramanın station klasörü mtime'larını ve tarih listelerini yükler"""
+    if manifest_path and os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Tarama manifest'i okunamadı, tam tarama yapılacak: {e}")
+    return {}
+
+def save_manifest(manifest: dict, manifest_path: str = DISCOVERY_MANIFEST):
+    """Tarama manifest'ini atomik olarak kaydeder"""
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+def scan_station(station_folder_path: str, cached: dict = None):
+    """
+    Station klasöründeki tarih klasörlerini listeler
+
+    Klasörün mtime'ı manifest'tekiyle aynıysa (alt klasör eklenmemiş/silinmemiş)
+    önceki liste kullanılır ve klasör yeniden okunmaz.
+
+    Returns:
+        dict/None: {"mtime_ns": int, "dates": [str]}; klasör yoksa None
+    """
+    try:
+        mtime_ns = os.stat(station_folder_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if cached and cached.get("mtime_ns") == mtime_ns:
+        return cached
+    with os.scandir(station_folder_path) as entries:
+        dates = sorted(entry.name for entry in entries if entry.is_dir())
+    return {"mtime_ns": mtime_ns, "dates": dates}
+
+def discover_work(station_ids, base_path: str, manifest_path: str = DISCOVERY_MANIFEST, max_workers: int = 8):
+    """
+    Tüm station klasörlerini paralel tarar ve işlenecek station-gün listesini döndürür
+
+    Args:
+        station_ids (list): Station ID'leri
+        base_path (str): Station klasörlerinin bulunduğu ana klasör
+        manifest_path (str, optional): Değişmeyen klasörleri atlamak için kullanılan manifest (None ise kullanılmaz)
+        max_workers (int): Aynı anda taranacak klasör sayısı
+
+    Returns:
+        list[WorkItem]
+    """
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    station_ids = [str(station_id) for station_id in station_ids]
+
+    def scan(station_id):
+        return scan_station(os.path.join(base_path, station_id), manifest.get(station_id))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(scan, station_ids))
+
+    work_items = []
+    new_manifest = {}
+    for station_id, result in zip(station_ids, results):
+        if result is None:
+            logger.warning(f"{os.path.join(base_path, station_id)} klasörü bulunamadı")
+            continue
+        new_manifest[station_id] = result
+        work_items.extend(WorkItem(station_id, date) for date in result["dates"])
+        logger.debug("Station %s için %s tarih bulundu", station_id, len(result['dates']))
+
+    if manifest_path:
+        save_manifest(new_manifest, manifest_path)
+    reused = sum(1 for station_id, result in zip(station_ids, results) if result is not None and result is manifest.get(station_id))
+    logger.info(f"{len(station_ids)} station tarandı ({reused} klasör değişmemiş), {len(work_items)} station-gün bulundu")
+    return work_items
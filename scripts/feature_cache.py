@@ -0,0 +1,123 @@
+import os
+from scripts.logger import Logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow kurulu değilse önbellek kullanılmaz
+    pa = None
+
+# Logger'ı başlat
+logger = Logger()
+
+# Önbellek klasörü; boşsa önbellek kapalıdır
+FEATURE_CACHE_DIR = os.getenv('FEATURE_CACHE_DIR', '')
+
+class FeatureCache:
+    """
+    Çıkarılan özellikleri station-gün başına bir Arrow IPC (Feather v2) dosyasında saklar
+
+    Dosyalar {cache_dir}/v{EXTRACTOR_VERSION}/{station_id}/{date}.arrow yolundadır;
+    versiyon değişince eski dosyalar kullanılmaz. Dosyalar sıkıştırmasız yazılır,
+    böylece okuma memory map ile kopyasız yapılır. Satırlar id, STATION_ID, DATE
+    ve her özellik için bir sütundan oluşur.
+    """
+
+    def __init__(self, cache_dir: str = None, extractor_version: str = None):
+        if pa is None:
+            raise ImportError("Özellik önbelleği için pyarrow gerekli: pip install pyarrow")
+        self.cache_dir = cache_dir or FEATURE_CACHE_DIR
+        if not self.cache_dir:
+            raise ValueError("FEATURE_CACHE_DIR tanımlı değil")
+        self.extractor_version = str(extractor_version if extractor_version is not None else os.getenv('EXTRACTOR_VERSION'))
+        self.version_dir = os.path.join(self.cache_dir, f"v{self.extractor_version}")
+
+    def path(self, station_id, date):
+        return os.path.join(self.version_dir, str(station_id), f"{date}.arrow")
+
+    def write(self, features, station_id, date):
+        """
+        Station-günün özelliklerini yazar
+
+        Gün için dosya zaten varsa (ör. artımlı işlem, akış parçaları) satırlar
+        birleştirilir; aynı cycle id'leri için yeni değerler kullanılır.
+        Dosya geçici bir dosyaya yazılıp atomik olarak yerine konur.
+        """
+        station_id = str(station_id)
+        frame = features.reset_index()
+        frame.rename(columns={frame.columns[0]: "id"}, inplace=True)
+        frame["id"] = frame["id"].astype(str)
+        frame.insert(1, "STATION_ID", station_id)
+        frame.insert(2, "DATE", date)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+
+        existing = self.read_day(station_id, date)
+        if existing is not None:
+            new_ids = pa.array(frame["id"].unique())
+            keep = pc.invert(pc.is_in(existing["id"], value_set=new_ids))
+            table = pa.concat_tables([existing.filter(keep), table], promote_options="default")
+
+        file_path = self.path(station_id, date)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = file_path + ".tmp"
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, file_path)
+        logger.debug("Özellik önbelleği yazıldı: %s (%s satır)", file_path, table.num_rows)
+
+    def read_day(self, station_id, date):
+        """Station-günün tablosunu memory map ile kopyasız okur; dosya yoksa None döndürür"""
+        file_path = self.path(station_id, date)
+        if not os.path.exists(file_path):
+            return None
+        with pa.memory_map(file_path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def days(self, station_ids=None):
+        """Önbellekteki (station_id, date) çiftlerini döndürür"""
+        if not os.path.isdir(self.version_dir):
+            return []
+        station_ids = None if station_ids is None else {str(station_id) for station_id in station_ids}
+        result = []
+        for station_id in sorted(os.listdir(self.version_dir)):
+            if station_ids is not None and station_id not in station_ids:
+                continue
+            station_dir = os.path.join(self.version_dir, station_id)
+            for file_name in sorted(os.listdir(station_dir)):
+                if file_name.endswith(".arrow"):
+                    result.append((station_id, file_name[:-len(".arrow")]))
+        return result
+
+    def read(self, station_ids=None, dates=None, columns=None):
+        """
+        Birden fazla station-günü tek Arrow tablosu olarak okur
+
+        Args:
+            station_ids (list, optional): Yalnızca bu station'lar
+            dates (list, optional): Yalnızca bu tarihler (YYYY-MM-DD)
+            columns (list, optional): Yalnızca bu özellik sütunları (id, STATION_ID, DATE her zaman gelir)
+
+        Returns:
+            pa.Table: Günler kopyalanmadan birleştirilir (.to_pandas() ile DataFrame'e çevrilebilir)
+        """
+        dates = None if dates is None else set(dates)
+        tables = []
+        for station_id, date in self.days(station_ids):
+            if dates is not None and date not in dates:
+                continue
+            table = self.read_day(station_id, date)
+            if columns is not None:
+                table = table.select(["id", "STATION_ID", "DATE"] + [c for c in columns if c in table.column_names])
+            tables.append(table)
+        if not tables:
+            return pa.table({})
+        return pa.concat_tables(tables, promote_options="default")
+
+def get_feature_cache():
+    """FEATURE_CACHE_DIR tanımlı ve pyarrow kuruluysa FeatureCache, aksi halde None döndürür"""
+    if not FEATURE_CACHE_DIR:
+        return None
+    if pa is None:
+        logger.warning("FEATURE_CACHE_DIR tanımlı fakat pyarrow kurulu değil, özellik önbelleği kapalı")
+        return None
+    return FeatureCache(FEATURE_CACHE_DIR)
@@ -1,97 +1,228 @@
+import os
 import pandas as pd
 import numpy as np
 from scipy.signal import find_peaks
 import traceback
 from scripts.logger import Logger
+from scripts.metrics import Metrics
+from scripts.cycle_batch import CycleBatch
 
 # Logger'ı başlat
 logger = Logger()
 
-def feature_extraction(data, pressure_columns, temp_columns):
-    """Verilerden özellik çıkarır"""
+# Metrikleri başlat
+metrics = Metrics()
+
+# Ara değerler: ad -> hesaplama fonksiyonu. Özellikler ihtiyaç duydukları ara değerleri bildirir.
+INTERMEDIATES = {
+    "gradient": lambda s: np.gradient(s.x),
+    "peaks": lambda s: find_peaks(s.x)[0],
+    "neg_peaks": lambda s: find_peaks(-s.x)[0],
+    "argmax": lambda s: np.argmax(s.x),
+    "argmin": lambda s: np.argmin(s.x),
+}
+
+class Signal:
+    """Bir cycle kanalının ara değerlerini değerlendirme planına göre bir kez hesaplar
+
+    Değerler float64'e yükseltilir; böylece float32 diziler ile eski liste
+    girdisi birebir aynı sonuçları verir. Plandaki ara değerler ilk
+    kullanıldıklarında hesaplanır ve aynı cycle'daki tüm özellikler tarafından
+    paylaşılır. Plana dahil olmayan bir ara değere erişim hata verir.
+    """
+
+    def __init__(self, x, plan):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.n = len(self.x)
+        self._plan = plan
+
+    def __getattr__(self, name):
+        # Yalnızca henüz hesaplanmamış ara değerler için çağrılır
+        if name.startswith("_") or name not in self._plan:
+            raise AttributeError(f"'{name}' ara değeri değerlendirme planında yok")
+        value = INTERMEDIATES[name](self)
+        setattr(self, name, value)
+        return value
+
+def _max_point_derivative(s):
+    i = s.argmax
+    if 0 < i < s.n - 1:
+        return (s.x[i + 1] - s.x[i - 1]) / 2
+    if i > 0:
+        return s.x[i] - s.x[i - 1]
+    if i < s.n - 1:
+        return s.x[i + 1] - s.x[i]
+    return np.nan
+
+# Özellik kayıtları: ad -> (gerekli ara değerler, fonksiyon)
+pressure_feature_funcs = {
+    "mean": ((), lambda s: np.mean(s.x)),
+    "std": ((), lambda s: np.std(s.x)),
+    "median": ((), lambda s: np.median(s.x)),
+    "max_point": ((), lambda s: np.max(s.x) if s.n > 0 else np.nan),
+    "max_point_derivative": (("argmax",), _max_point_derivative),
+    "max_point_time": (("argmax",), lambda s: s.argmax),
+    "derivative_of_first_peak": (("gradient", "peaks"), lambda s: (s.gradient[s.peaks[0]] if len(s.peaks) > 0 else np.nan)),
+    "derivative_of_first_peak_time": (("peaks",), lambda s: (s.peaks[0] if len(s.peaks) > 0 else np.nan)),
+    "derivative_of_second_peak": (("gradient", "peaks"), lambda s: (s.gradient[s.peaks[1]] if len(s.peaks) > 1 else np.nan)),
+    "derivative_of_second_peak_time": (("peaks",), lambda s: (s.peaks[1] if len(s.peaks) > 1 else np.nan)),
+    "area_under_curve": ((), lambda s: np.trapz(s.x)),
+    "slope_angle_of_first_localmax": (("gradient", "peaks"), lambda s: (np.degrees(np.arctan(s.gradient[s.peaks[0]])) if len(s.peaks) > 0 else np.nan)),
+    "slope_angle_of_first_localmax_time": (("peaks",), lambda s: (s.peaks[0] if len(s.peaks) > 0 else np.nan)),
+    "slope_angle_of_first_localmin": (("gradient", "neg_peaks"), lambda s: (np.degrees(np.arctan(s.gradient[s.neg_peaks[0]])) if len(s.neg_peaks) > 0 else np.nan)),
+    "slope_angle_of_first_localmin_time": (("neg_peaks",), lambda s: (s.neg_peaks[0] if len(s.neg_peaks) > 0 else np.nan)),
+    "first_local_max_point": (("peaks",), lambda s: (s.x[s.peaks[0]] if len(s.peaks) > 0 else np.nan)),
+    "first_local_max_point_time": (("peaks",), lambda s: (s.peaks[0] if len(s.peaks) > 0 else np.nan)),
+    "first_local_min_point": (("neg_peaks",), lambda s: (s.x[s.neg_peaks[0]] if len(s.neg_peaks) > 0 else np.nan)),
+    "first_local_min_point_time": (("neg_peaks",), lambda s: (s.neg_peaks[0] if len(s.neg_peaks) > 0 else np.nan)),
+    "global_max_point": ((), lambda s: np.max(s.x) if s.n > 0 else np.nan),
+    "global_max_point_time": (("argmax",), lambda s: s.argmax if s.n > 0 else np.nan),
+    "global_min_point": ((), lambda s: np.min(s.x) if s.n > 0 else np.nan),
+    "global_min_point_time": (("argmin",), lambda s: s.argmin if s.n > 0 else np.nan)
+}
+
+temp_feature_funcs = {
+    "min_temp": ((), lambda s: np.min(s.x)),
+    "min_temp_time": (("argmin",), lambda s: s.argmin),
+    "max_temp": ((), lambda s: np.max(s.x)),
+    "max_temp_time": (("argmax",), lambda s: s.argmax),
+    "cooling_rate": (("argmax",), lambda s: ((np.max(s.x) - s.x[-1]) / max(1, (s.n - s.argmax)))),
+    "cooling_rate_after_first_localmax": (("peaks",), lambda s: ((s.x[s.peaks[0]] - s.x[-1]) / max(1, (s.n - s.peaks[0])) if len(s.peaks) > 0 else np.nan)),
+    "derivative_of_temp_rising": (("gradient",), lambda s: np.max(s.gradient))
+}
+
+other_feature_funcs = {
+    "first_point": ((), lambda s: s.x[0] if s.n > 0 else np.nan),
+    "last_point": ((), lambda s: s.x[-1] if s.n > 0 else np.nan),
+    "slope_angle_of_globalmax": (("gradient",), lambda s: (np.degrees(np.arctan(s.gradient[np.argmax(s.gradient)])) if s.n > 1 else np.nan)),
+    "slope_angle_of_globalmax_time": (("gradient", "peaks"), lambda s: (s.peaks[np.argmax(s.gradient[s.peaks])] if len(s.peaks) > 0 else np.nan)),
+    "slope_angle_to_last_point": ((), lambda s: (np.degrees(np.arctan((s.x[-1] - s.x[-2]) / 1)) if s.n > 1 else np.nan)),
+    "slope_angle_to_last_point_time": ((), lambda s: (s.n - 2 if s.n > 1 else np.nan)),
+    "slope_angle_of_globalmin": (("gradient",), lambda s: (np.degrees(np.arctan(s.gradient[np.argmin(s.gradient)])) if s.n > 1 else np.nan)),
+    "slope_angle_of_globalmin_time": (("gradient", "neg_peaks"), lambda s: (s.neg_peaks[np.argmin(s.gradient[s.neg_peaks])] if len(s.neg_peaks) > 0 else np.nan))
+}
+
+# Özellik grupları. Kanal eşlemesi: pressure -> basınç, temp -> sıcaklık, other -> tüm kanallar
+FEATURE_GROUPS = {
+    "pressure": pressure_feature_funcs,
+    "temp": temp_feature_funcs,
+    "other": other_feature_funcs,
+}
+
+# FEATURE_GROUPS ortam değişkeni verilmezse çalışan gruplar (mevcut özellik seti)
+DEFAULT_FEATURE_GROUPS = ["pressure", "temp"]
+
+def register_feature(group, name, func, requires=()):
+    """Bir gruba yeni özellik ekler
+
+    Args:
+        group (str): Özellik grubu (pressure, temp, other veya yeni bir grup)
+        name (str): Özellik adı (çıktı sütunu '<kanal>_<ad>' olur)
+        func (callable): Signal alıp tek bir değer döndüren fonksiyon
+        requires (tuple): Fonksiyonun kullandığı ara değerler (INTERMEDIATES anahtarları)
+    """
+    unknown = [r for r in requires if r not in INTERMEDIATES]
+    if unknown:
+        raise ValueError(f"Bilinmeyen ara değer(ler): {unknown}")
+    FEATURE_GROUPS.setdefault(group, {})[name] = (tuple(requires), func)
+
+def build_plan(feature_funcs, feature_names):
+    """Seçilen özelliklerin ihtiyaç duyduğu ara değerlerin kümesini döndürür"""
+    plan = set()
+    for feature in feature_names:
+        plan.update(feature_funcs[feature][0])
+    return frozenset(plan)
+
+def _enabled_groups(groups):
+    """Çalışacak özellik gruplarını parametreden veya FEATURE_GROUPS ortam değişkeninden belirler"""
+    if groups is None:
+        env_groups = os.getenv('FEATURE_GROUPS')
+        groups = [g.strip() for g in env_groups.split(',') if g.strip()] if env_groups else DEFAULT_FEATURE_GROUPS
+    unknown = [g for g in groups if g not in FEATURE_GROUPS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen özellik grubu: {unknown}")
+    return list(groups)
+
+def enabled_feature_groups():
+    """FEATURE_GROUPS ortam değişkenine göre çalışan grupları sıralı döndürür (parmak izinde kullanılır)"""
+    return sorted(_enabled_groups(None))
+
+def _column(data, col):
+    """DataFrame veya CycleBatch'ten bir kanalı cycle bazında liste olarak döndürür"""
+    if isinstance(data, CycleBatch):
+        return data.channel(col)
+    return data[col].tolist()
+
+@metrics.timed("feature_extraction")
+def feature_extraction(data, pressure_columns, temp_columns, groups=None, feature_names=None):
+    """Verilerden özellik çıkarır
+
+    Her kanal için seçilen özelliklerden bir değerlendirme planı kurulur;
+    cycle başına bir Signal oluşturulur ve tüm özellikler plandaki ortak ara
+    değerlerden türetilir (find_peaks/gradient cycle başına en fazla bir kez).
+
+    Args:
+        data: data_extraction'ın döndürdüğü DataFrame veya CycleBatch
+        pressure_columns (list): Basınç kanalları
+        temp_columns (list): Sıcaklık kanalları
+        groups (list, optional): Çalışacak özellik grupları (varsayılan: FEATURE_GROUPS ortam değişkeni veya pressure,temp)
+        feature_names (list, optional): Yalnızca bu çıktı sütunlarını hesapla (ör. ['Pressure1_mean'])
+    """
     try:
-        features = pd.DataFrame()
-        
-        pressure_feature_funcs = {
-            "mean": lambda x: np.mean(x),
-            "std": lambda x: np.std(x),
-            "median": lambda x: np.median(x),
-            "max_point": lambda x: np.max(x) if len(x) > 0 else np.nan,
-            "max_point_derivative": lambda x: (
-                (x[np.argmax(x) + 1] - x[np.argmax(x) - 1]) / 2
-                if 0 < np.argmax(x) < len(x) - 1 else
-                (x[np.argmax(x)] - x[np.argmax(x) - 1])
-                if np.argmax(x) > 0 else
-                (x[np.argmax(x) + 1] - x[np.argmax(x)])
-                if np.argmax(x) < len(x) - 1 else np.nan),
-            "max_point_time": lambda x: np.argmax(x),
-            "derivative_of_first_peak": lambda x: (np.gradient(x)[find_peaks(x)[0][0]] if len(find_peaks(x)[0]) > 0 else np.nan),
-            "derivative_of_first_peak_time": lambda x: (find_peaks(x)[0][0] if len(find_peaks(x)[0]) > 0 else np.nan),
-            "derivative_of_second_peak": lambda x: (np.gradient(x)[find_peaks(x)[0][1]] if len(find_peaks(x)[0]) > 1 else np.nan),
-            "derivative_of_second_peak_time": lambda x: (find_peaks(x)[0][1] if len(find_peaks(x)[0]) > 1 else np.nan),
-            "area_under_curve": lambda x: np.trapz(x),
-            "slope_angle_of_first_localmax": lambda x: (np.degrees(np.arctan(np.gradient(x)[find_peaks(x)[0][0]])) if len(find_peaks(x)[0]) > 0 else np.nan),
-            "slope_angle_of_first_localmax_time": lambda x: (find_peaks(x)[0][0] if len(find_peaks(x)[0]) > 0 else np.nan),
-            "slope_angle_of_first_localmin": lambda x: (np.degrees(np.arctan(np.gradient(x)[find_peaks(-np.array(x))[0][0]])) if len(find_peaks(-np.array(x))[0]) > 0 else np.nan),
-            "slope_angle_of_first_localmin_time": lambda x: (find_peaks(-np.array(x))[0][0] if len(find_peaks(-np.array(x))[0]) > 0 else np.nan),
-            "first_local_max_point": lambda x: (x[find_peaks(x)[0][0]] if len(find_peaks(x)[0]) > 0 else np.nan),
-            "first_local_max_point_time": lambda x: (find_peaks(x)[0][0] if len(find_peaks(x)[0]) > 0 else np.nan),
-            "first_local_min_point": lambda x: (x[find_peaks(-np.array(x))[0][0]] if len(find_peaks(-np.array(x))[0]) > 0 else np.nan),
-            "first_local_min_point_time": lambda x: (find_peaks(-np.array(x))[0][0] if len(find_peaks(-np.array(x))[0]) > 0 else np.nan),
-            "global_max_point": lambda x: np.max(x) if len(x) > 0 else np.nan,
-            "global_max_point_time": lambda x: np.argmax(x) if len(x) > 0 else np.nan,
-            "global_min_point": lambda x: np.min(x) if len(x) > 0 else np.nan,
-            "global_min_point_time": lambda x: np.argmin(x) if len(x) > 0 else np.nan
-        }
-        
-        temp_feature_funcs = {
-            "min_temp": lambda x: np.min(x),
-            "min_temp_time": lambda x: np.argmin(x),
-            "max_temp": lambda x: np.max(x),
-            "max_temp_time": lambda x: np.argmax(x),
-            "cooling_rate": lambda x: ((np.max(x) - x[-1]) / max(1, (len(x) - np.argmax(x)))),
-            "cooling_rate_after_first_localmax": lambda x: ((x[find_peaks(x)[0][0]] - x[-1]) / max(1, (len(x) - find_peaks(x)[0][0]))if len(find_peaks(x)[0]) > 0 else np.nan),
-            "derivative_of_temp_rising": lambda x: np.max(np.gradient(x))
-        }
-        
-        other_feature_funcs = {
-            "first_point": lambda x: x[0] if len(x) > 0 else np.nan,
-            "last_point": lambda x: x[-1] if len(x) > 0 else np.nan,
-            "slope_angle_of_globalmax": lambda x: (np.degrees(np.arctan(np.gradient(x)[np.argmax(np.gradient(x))])) if len(x) > 1 else np.nan),
-            "slope_angle_of_globalmax_time": lambda x: (find_peaks(x)[0][np.argmax(np.gradient(x)[find_peaks(x)[0]])] if len(find_peaks(x)[0]) > 0 else np.nan),
-            "slope_angle_to_last_point": lambda x: (np.degrees(np.arctan((x[-1] - x[-2]) / 1)) if len(x) > 1 else np.nan),
-            "slope_angle_to_last_point_time": lambda x: (len(x) - 2 if len(x) > 1 else np.nan),
-            "slope_angle_of_globalmin": lambda x: (np.degrees(np.arctan(np.gradient(x)[np.argmin(np.gradient(x))])) if len(x) > 1 else np.nan),
-            "slope_angle_of_globalmin_time": lambda x: (find_peaks(np.array(-x))[0][np.argmin(np.gradient(x)[find_peaks(np.array(-x))[0]])] if len(find_peaks(np.array(-x))[0]) > 0 else np.nan)
+        logger.info("Özellik çıkarma başlatıldı")
+        logger.debug("Basınç sütunları: %s", pressure_columns)
+        logger.debug("Sıcaklık sütunları: %s", temp_columns)
+
+        group_columns = {
+            "pressure": pressure_columns,
+            "temp": temp_columns,
+            "other": list(pressure_columns) + list(temp_columns),
         }
+        feature_columns = [(FEATURE_GROUPS[g], group_columns.get(g, [])) for g in _enabled_groups(groups)]
+
+        # Çıktı sütunlarının sırası: grup -> özellik -> kanal
+        output_names = [
+            (feature_funcs, feature, col)
+            for feature_funcs, columns in feature_columns
+            for feature in feature_funcs
+            for col in columns
+        ]
+        if feature_names is not None:
+            wanted = set(feature_names)
+            unknown = wanted - {col + "_" + feature for _, feature, col in output_names}
+            if unknown:
+                raise ValueError(f"Bilinmeyen özellik(ler): {sorted(unknown)}")
+            output_names = [item for item in output_names if item[2] + "_" + item[1] in wanted]
+
+        # Kanal bazında plan kur: bir kanalın ara değerleri yalnızca o kanal işlenirken bellekte tutulur
+        channel_features = {}
+        for feature_funcs, feature, col in output_names:
+            channel_features.setdefault(col, []).append((feature_funcs, feature))
+
+        index = data.index
+        computed = {}
+        for col, col_features in channel_features.items():
+            plan = frozenset().union(*(build_plan(funcs, [feature]) for funcs, feature in col_features))
+            signals = [Signal(x, plan) for x in _column(data, col)]
+            for feature_funcs, feature in col_features:
+                func = feature_funcs[feature][1]
+                try:
+                    computed[col + "_" + feature] = pd.Series(
+                        [func(s) for s in signals], index=index
+                    )
+                    logger.debug("Özellik çıkarıldı: %s_%s", col, feature)
+                except Exception as e:
+                    logger.error(f"Özellik çıkarılırken hata oluştu: {col}_{feature}", e)
+                    logger.error(f"Traceback: {traceback.format_exc()}")
+                    raise
 
-        logger.info("Özellik çıkarma başlatıldı")
-        logger.debug(f"Basınç sütunları: {pressure_columns}")
-        logger.debug(f"Sıcaklık sütunları: {temp_columns}")
-
-        # Tüm özellikleri ve sütunları birleştirerek tek seferde işle
-        feature_columns = [(pressure_feature_funcs, pressure_columns), (temp_feature_funcs, temp_columns)]
-        
-        # Tüm özellikleri ve sütunları birleştirerek tek seferde işle
-        all_features = {}
-        for feature_funcs, columns in feature_columns:
-            for feature in feature_funcs:
-                for col in columns:
-                    try:
-                        all_features[col + "_" + feature] = data[col].apply(feature_funcs[feature])
-                        logger.debug(f"Özellik çıkarıldı: {col}_{feature}")
-                    except Exception as e:
-                        logger.error(f"Özellik çıkarılırken hata oluştu: {col}_{feature}", e)
-                        logger.error(f"Traceback: {traceback.format_exc()}")
-                        raise
-        
         # Tüm özellikleri tek seferde birleştir
+        all_features = {col + "_" + feature: computed[col + "_" + feature] for _, feature, col in output_names}
         features = pd.concat(all_features, axis=1)
+        metrics.inc("feature_values", features.size)
         logger.info(f"Toplam {len(features.columns)} özellik başarıyla çıkarıldı")
         return features
     except Exception as e:
         logger.error("Özellik çıkarma işlemi sırasında hata oluştu", e)
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
-
-
@@ -0,0 +1,173 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from collections import namedtuple
+from scripts.logger import Logger
+from scripts.read_bin import parse_cycle_file_name
+from scripts.cycle_pack import open_day_pack
+from scripts.feature_extraction import DEFAULT_FEATURE_GROUPS, enabled_feature_groups
+
+# Logger'ı başlat
+logger = Logger()
+
+FINGERPRINT_DB = "fingerprints.db"
+
+# action: "skip" (değişiklik yok), "full" (tüm gün) veya "incremental" (yalnızca cycle_ids)
+DayPlan = namedtuple('DayPlan', ['station_id', 'date', 'action', 'cycle_ids', 'files', 'digest'])
+
+def scan_day_files(station_id, date, base_path=None):
+    """
+    Tarih klasöründeki .bin dosyalarının boyut ve mtime bilgisini toplar
+
+    Dosyalar açılmaz; yalnızca stat bilgisi (ve varsa pack header'ı) kullanılır.
+
+    Returns:
+        dict: göreli dosya yolu -> [boyut, mtime_ns]
+    """
+    day_folder_path = os.path.join(base_path or os.getenv('path'), str(station_id), date)
+    files = stat_files(day_folder_path, (
+        os.path.join(root, file_name)
+        for root, dirs, file_names in os.walk(day_folder_path)
+        for file_name in file_names if file_name.endswith(".bin")
+    ))
+
+    # Sıkıştırılmış (compact) klasörde silinmiş kaynak dosyaların bilgisi pack'ten alınır
+    pack = open_day_pack(day_folder_path)
+    if pack is not None:
+        for name, info in pack.files.items():
+            files.setdefault(name, list(info))
+    return files
+
+def stat_files(day_folder_path, file_paths):
+    """Verilen dosyaların göreli yol -> [boyut, mtime_ns] bilgisini döndürür (silinmiş dosyalar atlanır)"""
+    files = {}
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        files[os.path.relpath(file_path, day_folder_path)] = [stat.st_size, stat.st_mtime_ns]
+    return files
+
+def compute_digest(files: dict) -> str:
+    """Dosya listesinden (ad, boyut, mtime) sıra bağımsız bir özet üretir"""
+    h = hashlib.sha1()
+    for name in sorted(files):
+        size, mtime_ns = files[name]
+        h.update(f"{name}\0{size}\0{mtime_ns}\n".encode('utf-8'))
+    return h.hexdigest()
+
+def _cycle_id(relative_path):
+    """Dosya adından cycle id'sini çıkarır; ad beklenen biçimde değilse None döndürür"""
+    try:
+        return parse_cycle_file_name(os.path.basename(relative_path))[0]
+    except (IndexError, ValueError):
+        return None
+
+def without_cycles(plan: DayPlan, cycle_ids) -> DayPlan:
+    """İşlenmeyen cycle'ların dosyalarını parmak izinden çıkarır; bu dosyalar sonraki çalıştırmada yeni sayılır"""
+    if not cycle_ids:
+        return plan
+    files = {name: info for name, info in plan.files.items() if _cycle_id(name) not in cycle_ids}
+    return plan._replace(files=files, digest=compute_digest(files))
+
+class FingerprintStore:
+    """
+    Station-gün başına girdi dosyalarının parmak izini ve EXTRACTOR_VERSION'ı saklar
+
+    Girdiler, extractor versiyonu ve çalışan özellik grupları (FEATURE_GROUPS)
+    değişmemişse gün atlanır; güne yeni dosya eklendiyse yalnızca
+    yeni/değişen dosyaların cycle'ları yeniden işlenir. Gruplar değiştiyse
+    gün tamamen yeniden işlenir.
+    """
+
+    def __init__(self, db_path: str = FINGERPRINT_DB, extractor_version: str = None, feature_groups: list = None):
+        self.db_path = db_path
+        self.extractor_version = str(extractor_version if extractor_version is not None else os.getenv('EXTRACTOR_VERSION'))
+        self.feature_groups = ",".join(sorted(feature_groups) if feature_groups is not None else enabled_feature_groups())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS DAY_FINGERPRINTS (
+                STATION_ID TEXT NOT NULL,
+                DATE TEXT NOT NULL,
+                EXTRACTOR_VERSION TEXT NOT NULL,
+                DIGEST TEXT NOT NULL,
+                FILES TEXT NOT NULL,
+                UPDATED_AT TEXT NOT NULL,
+                PRIMARY KEY (STATION_ID, DATE)
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(DAY_FINGERPRINTS)")}
+        if "FEATURE_GROUPS" not in columns:
+            # Eski kayıtlar varsayılan gruplarla işlenmiş sayılır (NULL)
+            self._conn.execute("ALTER TABLE DAY_FINGERPRINTS ADD COLUMN FEATURE_GROUPS TEXT")
+        self._conn.commit()
+
+    def get(self, station_id, date):
+        """Kayıtlı parmak izini döndürür: (extractor_version, digest, files, feature_groups) veya None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT EXTRACTOR_VERSION, DIGEST, FILES, FEATURE_GROUPS FROM DAY_FINGERPRINTS WHERE STATION_ID = ? AND DATE = ?",
+                (str(station_id), date)
+            ).fetchone()
+        if row is None:
+            return None
+        feature_groups = row[3] if row[3] is not None else ",".join(sorted(DEFAULT_FEATURE_GROUPS))
+        return row[0], row[1], json.loads(row[2]), feature_groups
+
+    def plan(self, station_id, date, base_path=None) -> DayPlan:
+        """Station-günün atlanacağını, tamamen veya kısmen işleneceğini belirler"""
+        files = scan_day_files(station_id, date, base_path)
+        digest = compute_digest(files)
+        stored = self.get(station_id, date)
+
+        if stored is None or stored[0] != self.extractor_version or stored[3] != self.feature_groups:
+            return DayPlan(station_id, date, "full", None, files, digest)
+        stored_version, stored_digest, stored_files, _ = stored
+        if stored_digest == digest:
+            return DayPlan(station_id, date, "skip", set(), files, digest)
+        if any(name not in files for name in stored_files):
+            # Silinen dosya varsa kısmi işlem güvenli değil, tüm gün yeniden işlenir
+            return DayPlan(station_id, date, "full", None, files, digest)
+
+        changed = {name for name, info in files.items() if stored_files.get(name) != info}
+        cycle_ids = {_cycle_id(name) for name in changed} - {None}
+        if not cycle_ids:
+            return DayPlan(station_id, date, "skip", set(), files, digest)
+        return DayPlan(station_id, date, "incremental", cycle_ids, files, digest)
+
+    def commit(self, plan: DayPlan):
+        """Başarıyla işlenen station-günün parmak izini kaydeder"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO DAY_FINGERPRINTS (STATION_ID, DATE, EXTRACTOR_VERSION, DIGEST, FILES, UPDATED_AT, FEATURE_GROUPS)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (str(plan.station_id), plan.date, self.extractor_version, plan.digest,
+                 json.dumps(plan.files), datetime.now().isoformat(), self.feature_groups)
+            )
+            self._conn.commit()
+
+    def add_files(self, station_id, date, files: dict):
+        """
+        İşlenen dosyaları (ör. izleme modunda) günün parmak izine ekler
+
+        Kayıt yoksa yalnızca bu dosyalarla oluşturulur; sonraki planda günün
+        diğer dosyalarının cycle'ları kısmi işlenir. Kayıt başka bir extractor
+        versiyonu veya özellik gruplarıyla yazıldıysa gün zaten tamamen
+        işleneceği için kayıt değiştirilmez.
+        """
+        stored = self.get(station_id, date)
+        if stored is not None and (stored[0] != self.extractor_version or stored[3] != self.feature_groups):
+            return
+        merged = dict(stored[2]) if stored is not None else {}
+        merged.update(files)
+        self.commit(DayPlan(station_id, date, "incremental", None, merged, compute_digest(merged)))
+
+    def close(self):
+        self._conn.close()
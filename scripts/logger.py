@@ -1,7 +1,22 @@
 import logging
+import logging.handlers
+import multiprocessing
+import atexit
+import queue
 import os
 from datetime import datetime
 
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """Kaydı biçimlendirmeden kuyruğa koyar
+
+    Standart QueueHandler.prepare() mesajı çağıran thread'de biçimlendirir
+    (kuyruk başka process'e gidebileceği için). Kuyruk aynı process'te
+    olduğundan biçimlendirme dinleyici thread'ine bırakılır.
+    """
+
+    def prepare(self, record):
+        return record
+
 class Logger:
     _instance = None
     _initialized = False
@@ -20,26 +35,27 @@ class Logger:
 
             # Tarih formatını belirle
             current_date = datetime.now().strftime('%Y-%m-%d')
-            
-            # Logger'ı yapılandır
+
+            # Logger'ı yapılandır (LOG_LEVEL altındaki mesajlar hiç oluşturulmaz)
             self.logger = logging.getLogger('tubitak_logger')
-            self.logger.setLevel(logging.DEBUG)
-            
+            self.logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+            self.logger.propagate = False
+
             # Handler'ları temizle (tekrarlanmayı önlemek için)
             if self.logger.handlers:
                 self.logger.handlers.clear()
-            
+
             # Genel log dosyası için handler
             general_handler = logging.FileHandler(
                 os.path.join(log_dir, f'{current_date}.log'),
                 encoding='utf-8'
             )
-            general_handler.setLevel(logging.INFO)
+            general_handler.setLevel(logging.DEBUG)
             general_formatter = logging.Formatter(
                 '%(asctime)s - %(levelname)s - %(message)s'
             )
             general_handler.setFormatter(general_formatter)
-            
+
             # Hata log dosyası için handler
             error_handler = logging.FileHandler(
                 os.path.join(log_dir, f'{current_date}_error.log'),
@@ -50,24 +66,69 @@ class Logger:
                 '%(asctime)s - %(levelname)s - %(message)s\n%(exc_info)s'
             )
             error_handler.setFormatter(error_formatter)
-            
-            # Handler'ları logger'a ekle
-            self.logger.addHandler(general_handler)
-            self.logger.addHandler(error_handler)
-            
+
+            # Dosya yazma işlemleri arka plandaki dinleyici thread'inde yapılır
+            self._handlers = (general_handler, error_handler)
+            self._queue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(self._queue, *self._handlers, respect_handler_level=True)
+            self._listener.start()
+            self._worker_queue = None
+            self._worker_listener = None
+            atexit.register(self.stop)
+
+            self.logger.addHandler(_InProcessQueueHandler(self._queue))
+
             Logger._initialized = True
 
-    def debug(self, message):
-        self.logger.debug(message)
+    def stop(self):
+        """Kuyruktaki kayıtları dosyalara yazar ve dinleyicileri durdurur"""
+        for name in ('_worker_listener', '_listener'):
+            listener = getattr(self, name, None)
+            if listener is not None:
+                setattr(self, name, None)
+                listener.stop()
+
+    def worker_queue(self):
+        """Worker process logları için kuyruk döndürür (ilk çağrıda ana process'te dinlemeye başlar)"""
+        if self._worker_queue is None:
+            self._worker_queue = multiprocessing.Queue()
+            self._worker_listener = logging.handlers.QueueListener(self._worker_queue, *self._handlers, respect_handler_level=True)
+            self._worker_listener.start()
+        return self._worker_queue
+
+    @staticmethod
+    def init_worker(log_queue):
+        """
+        Worker process'in loglarını ana process'e yönlendirir
+
+        ProcessPoolExecutor(initializer=Logger.init_worker, initargs=(logger.worker_queue(),))
+        şeklinde kullanılır. Kayıtlar worker'da biçimlendirilip kuyruğa konur ve
+        dosyalara ana process'teki dinleyici tarafından yazılır.
+        """
+        instance = Logger.__new__(Logger)
+        instance.logger = logging.getLogger('tubitak_logger')
+        instance.logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        instance.logger.propagate = False
+        instance.logger.handlers.clear()
+        instance.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        instance._listener = None
+        instance._worker_listener = None
+        Logger._initialized = True
+
+    def debug(self, message, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, *args)
 
-    def info(self, message):
-        self.logger.info(message)
+    def info(self, message, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(message, *args)
 
-    def warning(self, message):
-        self.logger.warning(message)
+    def warning(self, message, *args):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(message, *args)
 
     def error(self, message, exc_info=None):
         if exc_info:
             self.logger.error(message, exc_info=exc_info)
         else:
-            self.logger.error(message) 
\ No newline at end of file
+            self.logger.error(message)
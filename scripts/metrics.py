@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus metrik adlarının ön eki
+METRICS_PREFIX = "tubitak"
+
+class Metrics:
+    """
+    Process genelinde aşama süreleri ve sayaçlar (tekil nesne)
+
+    Aşama süreleri timer()/timed() ile, sayaçlar inc() ile toplanır. Worker
+    process'lerin snapshot()'ları ana process'te merge() ile birleştirilir.
+    Sonuçlar çalıştırma başına bir JSON satırı olarak (write_run) veya
+    Prometheus metin formatında (prometheus_text, serve) dışa verilir.
+    """
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not Metrics._initialized:
+            self._lock = threading.Lock()
+            self._server = None
+            self.reset()
+            Metrics._initialized = True
+
+    def reset(self):
+        """Tüm sayaç ve süreleri sıfırlar"""
+        with self._lock:
+            self.run_id = uuid.uuid4().hex[:12]
+            self.started_at = time.time()
+            self._counters = {}
+            # aşama -> [çağrı sayısı, toplam süre, en uzun süre]
+            self._timers = {}
+
+    def inc(self, name, value=1):
+        """Sayacı value kadar artırır"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        """Bir aşamanın süresini kaydeder"""
+        with self._lock:
+            timer = self._timers.setdefault(stage, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """with bloğunun süresini aşamaya ekler (hata olsa da)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage):
+        """Fonksiyonun her çağrısının süresini aşamaya ekleyen dekoratör"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Sayaç ve sürelerin JSON'a yazılabilir kopyasını döndürür"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "stages": {
+                    stage: {"count": count, "seconds": total, "max_seconds": longest}
+                    for stage, (count, total, longest) in self._timers.items()
+                },
+            }
+
+    def merge(self, snapshot):
+        """Başka bir process'in snapshot()'ını bu process'in metriklerine ekler"""
+        if not snapshot:
+            return
+        with self._lock:
+            for name, value in snapshot.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for stage, values in snapshot.get("stages", {}).items():
+                timer = self._timers.setdefault(stage, [0, 0.0, 0.0])
+                timer[0] += values["count"]
+                timer[1] += values["seconds"]
+                timer[2] = max(timer[2], values["max_seconds"])
+
+    def write_run(self, path, **extra):
+        """Çalıştırmanın metriklerini JSON-lines dosyasına tek satır olarak ekler"""
+        record = {
+            "run_id": self.run_id,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_seconds": time.time() - self.started_at,
+            "pid": os.getpid(),
+            **extra,
+            **self.snapshot(),
+        }
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def prometheus_text(self):
+        """Metrikleri Prometheus metin formatında döndürür"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{METRICS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for metric, key, kind in (
+            ("stage_calls_total", "count", "counter"),
+            ("stage_seconds_total", "seconds", "counter"),
+            ("stage_seconds_max", "max_seconds", "gauge"),
+        ):
+            metric = f"{METRICS_PREFIX}_{metric}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for stage, values in sorted(snapshot["stages"].items()):
+                lines.append(f'{metric}{{stage="{stage}"}} {values[key]}')
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path):
+        """Prometheus metin formatını dosyaya atomik olarak yazar (node_exporter textfile collector için)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="0.0.0.0"):
+        """/metrics adresinde Prometheus metin formatını sunan arka plan HTTP sunucusunu başlatır"""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ("/metrics", ""):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server
@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from scripts.logger import Logger
+from scripts.metrics import Metrics
+
+# Logger'ı başlat
+logger = Logger()
+
+# Metrikleri başlat
+metrics = Metrics()
+
+# Okuma thread sayısı ve aynı anda hattaki (okunan, özellikleri çıkarılan veya yazılmayı bekleyen) en fazla iş sayısı (0: otomatik)
+PIPELINE_READERS = int(os.getenv('PIPELINE_READERS', '2'))
+PIPELINE_MAX_IN_FLIGHT = int(os.getenv('PIPELINE_MAX_IN_FLIGHT', '0'))
+
+# Okuma/özellik çıkarma bitti, yazıcıya gönderilecek iş yok işareti
+_DONE = object()
+
+class _Cancelled(Exception):
+    """Hat durdurulduğu için özellik çıkarmaya gönderilmeyen iş"""
+
+class Pipeline:
+    """
+    Okuma, özellik çıkarma ve yazma aşamalarını örtüştüren üretici/tüketici hattı
+
+    read(item) okuma thread havuzunda, featurize(read_result) process
+    havuzunda, write(item, features) ise tek bir yazıcı thread'inde çalışır.
+    Böylece bir iş veritabanına yazılırken sonraki işler okunur ve özellikleri
+    çıkarılır. Hatta aynı anda en fazla max_in_flight iş bulunur; sınıra
+    ulaşıldığında yeni iş okunmaz (geri basınç), bellek sınırlı kalır.
+
+    featurize process'te çalıştığı için modül düzeyinde bir fonksiyon
+    olmalıdır; read sonucu ve featurize sonucu pickle edilebilir olmalıdır.
+    Yazmalar tamamlanma sırasıyla yapılır. Herhangi bir aşamadaki ilk hata
+    yeni iş alınmasını durdurur ve hattaki işler bittikten sonra run()
+    tarafından yükseltilir.
+    """
+
+    def __init__(self, read, featurize, write, readers=None, feature_workers=1, max_in_flight=None,
+                 initializer=None, initargs=()):
+        self.read = read
+        self.featurize = featurize
+        self.write = write
+        self.readers = max(PIPELINE_READERS if readers is None else readers, 1)
+        self.feature_workers = max(feature_workers, 1)
+        max_in_flight = max_in_flight or PIPELINE_MAX_IN_FLIGHT
+        # Varsayılan: her okuma ve özellik worker'ı için bir iş + yazılmakta olan bir iş
+        self.max_in_flight = max_in_flight if max_in_flight > 0 else self.readers + self.feature_workers + 1
+        self.initializer = initializer
+        self.initargs = initargs
+
+    def run(self, items):
+        """items'daki tüm işleri hattan geçirir; ilk hatayı yükseltir"""
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._results = queue.Queue()
+        self._failed = threading.Event()
+        self._errors = []
+
+        with ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="pipeline-read") as read_pool, \
+                ProcessPoolExecutor(max_workers=self.feature_workers, initializer=self.initializer,
+                                    initargs=self.initargs) as feature_pool:
+            self._feature_pool = feature_pool
+            writer = threading.Thread(target=self._write_loop, name="pipeline-write")
+            writer.start()
+            submitted = 0
+            try:
+                for item in items:
+                    if not self._acquire_slot():
+                        break
+                    submitted += 1
+                    future = read_pool.submit(self.read, item)
+                    future.add_done_callback(lambda future, item=item: self._on_read(item, future))
+            except BaseException as e:
+                self._fail(e)
+                raise
+            finally:
+                # Yazıcı, gönderilen işlerin tamamı bitince durur
+                self._results.put((_DONE, submitted, None))
+                writer.join()
+            self._feature_pool = None
+
+        if self._errors:
+            raise self._errors[0]
+
+    def _acquire_slot(self):
+        """Hatta yer açılana kadar bekler; hat hata ile durduysa False döndürür"""
+        if self._slots.acquire(blocking=False):
+            return not self._failed.is_set()
+        with metrics.timer("pipeline_backpressure"):
+            while not self._slots.acquire(timeout=0.5):
+                if self._failed.is_set():
+                    return False
+        return not self._failed.is_set()
+
+    def _fail(self, error):
+        if not self._failed.is_set():
+            self._errors.append(error)
+            self._failed.set()
+
+    def _on_read(self, item, future):
+        """Okuma bitince sonucu özellik çıkarma havuzuna gönderir (okuma thread'inde çalışır)"""
+        error = future.exception()
+        if error is None and self._failed.is_set():
+            error = _Cancelled()
+        if error is not None:
+            self._results.put((item, None, error))
+            return
+        try:
+            feature_future = self._feature_pool.submit(self.featurize, future.result())
+        except Exception as e:
+            self._results.put((item, None, e))
+            return
+        feature_future.add_done_callback(lambda feature_future: self._on_featurized(item, feature_future))
+
+    def _on_featurized(self, item, future):
+        error = future.exception()
+        self._results.put((item, None if error is not None else future.result(), error))
+
+    def _write_loop(self):
+        """Özellikleri çıkarılan işleri tek thread'de sırayla yazar"""
+        expected = None
+        finished = 0
+        while expected is None or finished < expected:
+            with metrics.timer("pipeline_writer_idle"):
+                item, result, error = self._results.get()
+            if item is _DONE:
+                expected = result
+                continue
+            finished += 1
+            try:
+                if error is not None:
+                    if not isinstance(error, _Cancelled):
+                        self._fail(error)
+                elif not self._failed.is_set():
+                    self.write(item, result)
+            except BaseException as e:
+                self._fail(e)
+            finally:
+                self._slots.release()
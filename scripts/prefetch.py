@@ -0,0 +1,61 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Aynı anda dosya okuyacak thread sayısı (ağ üzerindeki arşivlerde gecikmeyi örtüştürür; 0: sıralı okuma)
+IO_WORKERS = int(os.getenv('IO_WORKERS', '8'))
+
+def prefetch(func, items, max_workers=None, max_in_flight=None):
+    """
+    items için func'ı thread havuzunda önceden çalıştırır ve sonuçları items sırasıyla üretir
+
+    Tüketiciye verilen kayıt dışında en fazla max_in_flight okuma bekler, böylece
+    bellek sınırlı kalır ve tüketici sonucu işlerken sonraki okumalar sürer.
+    Hatalar yükseltilmez, kayıtla birlikte döndürülür.
+
+    Args:
+        func (callable): Tek kayıt için çağrılacak fonksiyon (ör. dosya okuma)
+        items (iterable): Kayıtlar; tembel okunur
+        max_workers (int, optional): Thread sayısı (varsayılan: IO_WORKERS, 0 ise sıralı)
+        max_in_flight (int, optional): Bekleyen en fazla okuma (varsayılan: 2 * max_workers)
+
+    Yields:
+        tuple: (kayıt, sonuç, hata) - hata yoksa None
+    """
+    max_workers = IO_WORKERS if max_workers is None else max_workers
+    if max_workers <= 0:
+        for item in items:
+            try:
+                yield item, func(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    max_in_flight = max_in_flight or 2 * max_workers
+    items = iter(items)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch") as executor:
+        def fill():
+            while len(pending) < max_in_flight:
+                for item in items:
+                    pending.append((item, executor.submit(func, item)))
+                    break
+                else:
+                    return
+
+        try:
+            fill()
+            while pending:
+                item, future = pending.popleft()
+                # Sonuç beklenirken/işlenirken sıradaki okumalar başlasın
+                fill()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield item, None, e
+                    continue
+                yield item, result, None
+        finally:
+            for item, future in pending:
+                future.cancel()
@@ -0,0 +1,84 @@
+import os
+import json
+import threading
+from scripts.logger import Logger
+
+# Logger'ı başlat
+logger = Logger()
+
+class ProgressStore:
+    """
+    Tamamlanan station-gün kayıtlarını append-only bir log dosyasında tutar
+
+    Her satır bir kayıt anahtarıdır ("<station_id>_<date>"). Açılışta dosya bir
+    kez okunup bellekteki kümeye yüklenir; üyelik kontrolü O(1), her yeni
+    kayıt dosyanın sonuna tek satır eklenip diske yazılır (fsync).
+    Eski progress.json dosyası varsa otomatik olarak taşınır.
+    """
+
+    def __init__(self, log_path: str = "progress.log", legacy_path: str = "progress.json"):
+        self.log_path = log_path
+        self.legacy_path = legacy_path
+        self.completed = set()
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.log_path) and self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate_legacy()
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            self.completed.update(line for line in content.splitlines() if line)
+            needs_newline = bool(content) and not content.endswith('\n')
+        else:
+            needs_newline = False
+
+        self._file = open(self.log_path, 'a', encoding='utf-8')
+        if needs_newline:
+            # Yarım kalmış son satırı kapat (ör. yazma sırasında kesinti)
+            self._file.write('\n')
+            self._file.flush()
+
+    def _migrate_legacy(self):
+        """progress.json içindeki tamamlanan kayıtları log dosyasına taşır"""
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+        completed = list(dict.fromkeys(legacy.get("completed", [])))
+
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{key}\n" for key in completed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        os.replace(self.legacy_path, self.legacy_path + ".migrated")
+        logger.info(f"{self.legacy_path} dosyasındaki {len(completed)} kayıt {self.log_path} dosyasına taşındı")
+
+    @staticmethod
+    def record_key(station_id, date) -> str:
+        return f"{station_id}_{date}"
+
+    def __contains__(self, record_key) -> bool:
+        return record_key in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def is_completed(self, station_id, date) -> bool:
+        """Kayıt daha önce tamamlanmış mı kontrol eder"""
+        return self.record_key(station_id, date) in self.completed
+
+    def add(self, station_id, date) -> bool:
+        """Kaydı tamamlandı olarak ekler; kayıt yeniyse True döndürür"""
+        record_key = self.record_key(station_id, date)
+        with self._lock:
+            if record_key in self.completed:
+                return False
+            self._file.write(f"{record_key}\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.completed.add(record_key)
+        return True
+
+    def close(self):
+        self._file.close()
@@ -5,43 +5,138 @@ import numpy as np
 from collections import defaultdict
 import traceback
 from scripts.logger import Logger
+from scripts.metrics import Metrics
+from scripts.cycle_batch import CycleBatch
+from scripts.prefetch import prefetch
+from scripts.cycle_pack import PackRef, PACK_FILE_NAME, open_day_pack, write_pack
 
 # Logger'ı başlat
 logger = Logger()
 
-def data_extraction(data_folder_direction,station_id):
+# Metrikleri başlat
+metrics = Metrics()
+
+def read_cycle_file(file_path):
+    """Tek kanallı cycle .bin dosyasını float32 NumPy dizisi olarak okur (kopyasız)"""
+    file_size = os.path.getsize(file_path)
+    if file_size % 4 != 0:
+        # struct.unpack ile aynı davranış: eksik byte'lı dosya okunmaz
+        raise struct.error(f"Dosya boyutu float32 ile uyumsuz: {file_size} byte")
+    return np.fromfile(file_path, dtype=np.float32)
+
+def read_cycle_entry(entry):
+    """Cycle kanalını dosya yolundan veya pack referansından (PackRef) okur"""
+    if isinstance(entry, PackRef):
+        return entry.pack.get(entry.cycle_id, entry.channel)
+    return read_cycle_file(entry)
+
+def _is_packed(packed_files, day_folder_path, file_path):
+    """Dosya pack'e yazıldığı haliyle duruyorsa True döndürür (sonradan değişen/yeniden yazılan dosyalar ayrıca okunur)"""
+    info = packed_files.get(os.path.relpath(file_path, day_folder_path))
+    if info is None:
+        return False
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns] == list(info)
+
+def parse_cycle_file_name(file_name):
+    """'X_468 ..._Temp1.bin' biçimindeki dosya adından (cycle id, kanal adı) döndürür"""
+    base_part, rest_part = file_name.split(' ', 1)
+    id = base_part.split('_')[1]  # Extract '468' as ID part
+    column_name = rest_part.split('_')[-1].split('.')[0]  # Extract 'Temp1' as column name
+    return id, column_name
+
+def _count_read(values, files=1):
+    """Okunan dosya ve byte sayısını metriklere ekler"""
+    metrics.inc("files_read", files)
+    metrics.inc("bytes_read", values.nbytes if isinstance(values, np.ndarray) else 4 * len(values))
+
+@metrics.timed("data_extraction")
+def data_extraction(data_folder_direction,station_id,as_numpy=False,as_batch=False,cycle_ids=None):
+    """Tarih klasöründeki cycle dosyalarını okur (dosyalar IO_WORKERS thread ile paralel okunur)
+
+    Args:
+        data_folder_direction (str): Tarih klasörü adı (ör. 2025-01-16)
+        station_id: Station ID'si
+        as_numpy (bool): True ise hücreler float32 NumPy dizisi olarak döner, liste oluşturulmaz
+        as_batch (bool): True ise DataFrame yerine sütunsal CycleBatch döner
+        cycle_ids (set, optional): Verilirse yalnızca bu cycle id'lerinin dosyaları okunur
+
+    Returns:
+        pd.DataFrame/CycleBatch: index=cycle id, sütunlar=Pressure1..4/Temp1..4
+    """
+    as_numpy = as_numpy or as_batch
     merged_data = defaultdict(lambda: defaultdict(list))
     main_folder_path = os.path.join(os.getenv('path'),str(station_id))
-    for root, dirs, files in os.walk(os.path.join(main_folder_path,data_folder_direction)):
-        for file_name in files:
-            if file_name.endswith(".bin"):
-                # Construct the full file path
-                file_path = os.path.join(root, file_name)
+    day_folder_path = os.path.join(main_folder_path,data_folder_direction)
 
-                try:
-                    # Extract parts of the file name
-                    base_part, rest_part = file_name.split(' ', 1)
-                    id = base_part.split('_')[1]  # Extract '468' as ID part
-                    column_name = rest_part.split('_')[-1].split('.')[0]  # Extract 'Temp1' as column name
-
-                    # Read the binary file efficiently
-                    with open(file_path, "rb") as file:
-                        data = file.read()
-                        values = list(struct.unpack(f'{len(data)//4}f', data))
-                    
-                    # Append values to the dictionary
-                    merged_data[id][column_name] = values
-                except (IndexError, struct.error) as e:
-                    print(f"Error processing file {file_name}: {e}")
+    # Klasör sıkıştırılmışsa (compact) cycle'lar pack'ten okunur; pack'te olmayan .bin dosyaları ayrıca okunur
+    pack = open_day_pack(day_folder_path)
+    packed_files = pack.files if pack is not None else {}
+
+    def day_files():
+        for root, dirs, files in os.walk(day_folder_path):
+            for file_name in files:
+                if file_name.endswith(".bin"):
+                    if packed_files and _is_packed(packed_files, day_folder_path, os.path.join(root, file_name)):
+                        continue
+                    try:
+                        # Extract parts of the file name
+                        id, column_name = parse_cycle_file_name(file_name)
+                    except IndexError as e:
+                        print(f"Error processing file {file_name}: {e}")
+                        continue
+                    if cycle_ids is not None and id not in cycle_ids:
+                        continue
+                    # Construct the full file path
+                    yield id, column_name, os.path.join(root, file_name)
+
+    def read(entry):
+        file_path = entry[2]
+        if as_numpy:
+            # Doğrudan float32 diziye oku, Python float'larına kutulama yapma
+            return read_cycle_file(file_path)
+        # Read the binary file efficiently
+        with open(file_path, "rb") as file:
+            data = file.read()
+        return list(struct.unpack(f'{len(data)//4}f', data))
+
+    loose_files = list(day_files())
+    if pack is not None:
+        if as_batch and not loose_files:
+            batch = pack.read(cycle_ids)
+            metrics.inc("bytes_read", batch.nbytes)
+            metrics.inc("cycles_read", len(batch))
+            return batch
+        for id, channels in pack.refs(cycle_ids).items():
+            for column_name, ref in channels.items():
+                values = read_cycle_entry(ref)
+                metrics.inc("bytes_read", values.nbytes)
+                merged_data[id][column_name] = values if as_numpy else values.tolist()
+
+    # Dosyalar thread havuzunda önceden okunur, sonuçlar klasör sırasıyla gelir
+    for (id, column_name, file_path), values, error in prefetch(read, loose_files):
+        if error is not None:
+            if not isinstance(error, struct.error):
+                raise error
+            print(f"Error processing file {os.path.basename(file_path)}: {error}")
+            continue
+        _count_read(values)
+        # Append values to the dictionary
+        merged_data[id][column_name] = values
+
+    metrics.inc("cycles_read", len(merged_data))
+    if as_batch:
+        return CycleBatch.from_dict(merged_data)
 
     # Convert merged data into a DataFrame
     merged_data_df = pd.DataFrame.from_dict(merged_data, orient='index')
 
     # Flatten nested lists and clean up
-    for column in merged_data_df.columns:
-        merged_data_df[column] = merged_data_df[column].apply(
-            lambda y: np.array(y).flatten().tolist() if isinstance(y, list) else y
-        )
+    if not as_numpy:
+        for column in merged_data_df.columns:
+            merged_data_df[column] = merged_data_df[column].apply(
+                lambda y: np.array(y).flatten().tolist() if isinstance(y, list) else y
+            )
 
     # Set index name for clarity
     merged_data_df.index.name = "id"
@@ -51,68 +146,230 @@ def data_extraction(data_folder_direction,station_id):
     
     return merged_data_df
 
-def read_bin_file(file_path):
+# Bir cycle'ın tamamlanmış sayılması için gereken kanal dosyaları
+CYCLE_CHANNELS = ["Pressure1","Pressure2","Pressure3","Pressure4","Temp1","Temp2","Temp3","Temp4"]
+
+def scan_cycle_files(data_folder_direction, station_id, cycle_ids=None):
+    """Tarih klasöründeki cycle dosyalarını okumadan, adlarından gruplar
+
+    Returns:
+        dict: cycle id -> {kanal adı: dosya yolu veya PackRef}
+    """
+    cycle_files = defaultdict(dict)
+    main_folder_path = os.path.join(os.getenv('path'),str(station_id))
+    day_folder_path = os.path.join(main_folder_path,data_folder_direction)
+
+    # Sıkıştırılmış klasörde kanallar dosya yolu yerine PackRef ile gösterilir
+    pack = open_day_pack(day_folder_path)
+    packed_files = {}
+    if pack is not None:
+        packed_files = pack.files
+        for id, channels in pack.refs(cycle_ids).items():
+            cycle_files[id].update(channels)
+
+    for root, dirs, files in os.walk(day_folder_path):
+        for file_name in files:
+            if file_name.endswith(".bin"):
+                if packed_files and _is_packed(packed_files, day_folder_path, os.path.join(root, file_name)):
+                    continue
+                try:
+                    id, column_name = parse_cycle_file_name(file_name)
+                except IndexError as e:
+                    print(f"Error processing file {file_name}: {e}")
+                    continue
+                if cycle_ids is not None and id not in cycle_ids:
+                    continue
+                cycle_files[id][column_name] = os.path.join(root, file_name)
+    return cycle_files
+
+def iter_cycle_batches(data_folder_direction, station_id, chunk_size=500, cycle_ids=None, required_channels=CYCLE_CHANNELS):
+    """Tüm kanal dosyaları mevcut olan cycle'ları en fazla chunk_size'lık CycleBatch'ler halinde okur
+
+    Dosyalar parça parça okunduğu için bellek kullanımı günün büyüklüğünden
+    bağımsızdır. Kanalları eksik cycle'lar (ör. henüz yazılmakta olan)
+    atlanır ve id'leri döndürülür; çağıran gün tamamlandı saymamalıdır.
+
+    Returns:
+        tuple: (CycleBatch üreteci, atlanan cycle id'lerinin kümesi)
+    """
+    cycle_files = scan_cycle_files(data_folder_direction, station_id, cycle_ids)
+    complete = sorted(id for id, channels in cycle_files.items() if all(c in channels for c in required_channels))
+    skipped = set(cycle_files) - set(complete)
+    if skipped:
+        logger.info("%s/%s: kanalları eksik %s cycle atlandı", station_id, data_folder_direction, len(skipped))
+
+    def batches():
+        for i in range(0, len(complete), chunk_size):
+            yield load_cycle_batch({id: cycle_files[id] for id in complete[i:i + chunk_size]})
+    return batches(), skipped
+
+@metrics.timed("data_extraction")
+def load_cycle_batch(cycle_files):
+    """{cycle id: {kanal adı: dosya yolu veya PackRef}} ile verilen dosyaları okuyup CycleBatch döndürür"""
+    merged_data = defaultdict(dict)
+    entries = ((id, column_name, file_path) for id, channels in cycle_files.items() for column_name, file_path in channels.items())
+    for (id, column_name, file_path), values, error in prefetch(lambda entry: read_cycle_entry(entry[2]), entries):
+        if error is not None:
+            if not isinstance(error, struct.error):
+                raise error
+            print(f"Error processing file {os.path.basename(file_path)}: {error}")
+            continue
+        _count_read(values, files=0 if isinstance(file_path, PackRef) else 1)
+        merged_data[id][column_name] = values
+    metrics.inc("cycles_read", len(merged_data))
+    return CycleBatch.from_dict(merged_data)
+
+def compact_day(data_folder_direction, station_id, compression="none", remove_sources=False):
+    """
+    Tarih klasöründeki cycle dosyalarını tek bir pack dosyasında (cycles.pack) birleştirir
+
+    Klasörde önceden bir pack varsa yeni .bin dosyalarıyla birlikte yeniden
+    yazılır. Pack geri okunup doğrulandıktan sonra remove_sources=True ise
+    yalnızca pack'e yazılan .bin dosyaları silinir; okunamayan veya adı
+    çözülemeyen dosyalar uyarı ile yerinde bırakılır. Kaynak dosyaların
+    boyut/mtime bilgisi pack'te saklanır, böylece parmak izi değişmez ve gün
+    yeniden işlenmez.
+
+    Returns:
+        int: Paketlenen cycle sayısı (paketlenecek yeni dosya yoksa 0)
+    """
+    day_folder_path = os.path.join(os.getenv('path'),str(station_id),data_folder_direction)
+    pack = open_day_pack(day_folder_path)
+    files = dict(pack.files) if pack is not None else {}
+
+    loose_paths = []
+    for root, dirs, file_names in os.walk(day_folder_path):
+        for file_name in file_names:
+            if file_name.endswith(".bin"):
+                file_path = os.path.join(root, file_name)
+                if files and _is_packed(files, day_folder_path, file_path):
+                    continue
+                loose_paths.append(file_path)
+    if not loose_paths:
+        return 0
+
+    # Önce pack'teki cycle'lar, sonra klasör sırasıyla yeni dosyalar (data_extraction ile aynı sıra)
+    merged_data = defaultdict(dict)
+    if pack is not None:
+        for id, channels in pack.refs().items():
+            for column_name, ref in channels.items():
+                merged_data[id][column_name] = read_cycle_entry(ref)
+    # (cycle id, kanal) -> değeri sağlayan dosya; aynı kanal için sonraki dosya geçerli
+    sources = {}
+    for file_path in loose_paths:
+        try:
+            id, column_name = parse_cycle_file_name(os.path.basename(file_path))
+            values = read_cycle_file(file_path)
+        except (IndexError, ValueError, struct.error) as e:
+            logger.warning("%s pack'e eklenmedi, yerinde bırakıldı: %s", file_path, e)
+            continue
+        merged_data[id][column_name] = values
+        sources[(id, column_name)] = file_path
+
+    packed_paths = list(sources.values())
+    if not packed_paths:
+        return 0
+    for file_path in packed_paths:
+        stat = os.stat(file_path)
+        files[os.path.relpath(file_path, day_folder_path)] = [stat.st_size, stat.st_mtime_ns]
+
+    batch = CycleBatch.from_dict(merged_data)
+    pack_path = os.path.join(day_folder_path, PACK_FILE_NAME)
+    write_pack(pack_path, batch, files, compression=compression)
+
+    # Yazılan pack'i doğrula: tüm cycle ve kanallar birebir aynı olmalı
+    written = open_day_pack(day_folder_path).read()
+    if written.cycle_ids != batch.cycle_ids or written.columns != batch.columns or any(
+        # Kanal başına (values, offsets, present) dizileri karşılaştırılır
+        not all(np.array_equal(a, b) for a, b in zip(written.channels[column_name], batch.channels[column_name]))
+        for column_name in batch.columns
+    ):
+        raise ValueError(f"Pack doğrulanamadı: {pack_path}")
+
+    if remove_sources:
+        for file_path in packed_paths:
+            os.remove(file_path)
+    skipped = len(loose_paths) - len(packed_paths)
+    if skipped:
+        logger.warning("%s/%s: %s dosya pack'e eklenmedi", station_id, data_folder_direction, skipped)
+    logger.info(f"{station_id}/{data_folder_direction}: {len(batch)} cycle {len(packed_paths)} dosyadan pack'e yazıldı")
+    return len(batch)
+
+# read_bin_file formatı: uint32 nokta sayısı + nokta başına (time, value) double çifti
+BIN_HEADER_DTYPE = np.dtype('<u4')
+BIN_RECORD_DTYPE = np.dtype([('time', '<f8'), ('value', '<f8')])
+
+def read_bin_records(file_path, mmap=False):
+    """
+    Binary dosyanın (time, value) kayıtlarını structured NumPy dizisi olarak okur
+
+    Header'daki nokta sayısı dosya boyutuyla doğrulanır. mmap=True ise veri
+    okunmaz, dosya np.memmap ile salt okunur eşlenir (sayfalar erişildikçe yüklenir).
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size == 0:
+        raise ValueError(f"Dosya boş: {file_path}")
+    if file_size < BIN_HEADER_DTYPE.itemsize:
+        raise ValueError("Header okunamadı")
+
+    with open(file_path, 'rb') as f:
+        num_points = int(np.fromfile(f, dtype=BIN_HEADER_DTYPE, count=1)[0])
+        logger.debug("Okunacak veri sayısı: %s", num_points)
+
+        if num_points <= 0:
+            raise ValueError(f"Geçersiz veri sayısı: {num_points}")
+        expected_size = BIN_HEADER_DTYPE.itemsize + num_points * BIN_RECORD_DTYPE.itemsize
+        if file_size < expected_size:
+            raise ValueError(f"Veri okuma hatası: header {num_points} nokta bildiriyor, dosya {file_size} byte (en az {expected_size} olmalı)")
+
+        metrics.inc("files_read")
+        metrics.inc("bytes_read", expected_size)
+        if not mmap:
+            return np.fromfile(f, dtype=BIN_RECORD_DTYPE, count=num_points)
+    return np.memmap(file_path, dtype=BIN_RECORD_DTYPE, mode='r', offset=BIN_HEADER_DTYPE.itemsize, shape=(num_points,))
+
+def read_bin_file(file_path, mmap=False):
     """Binary dosyayı okur ve DataFrame'e dönüştürür"""
     try:
-        logger.info(f"Binary dosya okunuyor: {file_path}")
+        logger.info("Binary dosya okunuyor: %s", file_path)
         
         if not os.path.exists(file_path):
             error_msg = f"Dosya bulunamadı: {file_path}"
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
-            
-        with open(file_path, 'rb') as f:
-            # Dosya boyutunu kontrol et
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                error_msg = f"Dosya boş: {file_path}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-                
-            # İlk 4 byte'ı oku (header)
-            header = f.read(4)
-            if len(header) < 4:
-                error_msg = "Header okunamadı"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-                
-            # Header'ı integer'a çevir
-            num_points = struct.unpack('I', header)[0]
-            logger.debug(f"Okunacak veri sayısı: {num_points}")
-            
-            if num_points <= 0:
-                error_msg = f"Geçersiz veri sayısı: {num_points}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-            
-            # Verileri oku
-            data = []
-            for _ in range(num_points):
-                try:
-                    point = struct.unpack('dd', f.read(16))  # Her nokta 2 double (16 byte)
-                    data.append(point)
-                except struct.error as e:
-                    error_msg = f"Veri okuma hatası: {str(e)}"
-                    logger.error(error_msg)
-                    logger.error(f"Traceback: {traceback.format_exc()}")
-                    raise
-            
-            # DataFrame oluştur
-            df = pd.DataFrame(data, columns=['time', 'value'])
-            logger.info(f"Toplam {len(df)} satır veri okundu")
-            
-            return df
+
+        records = read_bin_records(file_path, mmap=mmap)
+
+        # DataFrame oluştur
+        df = pd.DataFrame({'time': records['time'], 'value': records['value']})
+        logger.info("Toplam %s satır veri okundu", len(df))
+        
+        return df
             
     except Exception as e:
         logger.error("Binary dosya okuma işlemi sırasında hata oluştu", e)
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
-def read_multiple_bin_files(directory_path):
-    """Bir dizindeki tüm binary dosyaları okur ve bir DataFrame listesi döndürür"""
+def read_multiple_bin_files(directory_path, how="list"):
+    """
+    Bir dizindeki tüm binary dosyaları okur
+
+    Args:
+        directory_path (str): Binary dosyaların bulunduğu dizin
+        how (str): "list" ise DataFrame listesi, "concat" ise 'file' sütunlu tek
+            DataFrame, "mmap" ise {dosya adı: np.memmap (time, value) kayıtları}
+            döndürülür; mmap'te veri erişilene kadar diskten okunmaz
+
+    Returns:
+        list/pd.DataFrame/dict
+    """
     try:
         logger.info(f"Dizin okunuyor: {directory_path}")
         
+        if how not in ("list", "concat", "mmap"):
+            raise ValueError(f"Geçersiz how değeri: {how}")
+
         if not os.path.exists(directory_path):
             error_msg = f"Dizin bulunamadı: {directory_path}"
             logger.error(error_msg)
@@ -123,29 +380,44 @@ def read_multiple_bin_files(directory_path):
             logger.error(error_msg)
             raise NotADirectoryError(error_msg)
         
-        dataframes = []
-        for filename in os.listdir(directory_path):
-            if filename.endswith('.bin'):
-                try:
-                    file_path = os.path.join(directory_path, filename)
-                    logger.debug(f"İşleniyor: {filename}")
-                    df = read_bin_file(file_path)
-                    dataframes.append(df)
-                    logger.info(f"{filename} başarıyla okundu")
-                except Exception as e:
-                    logger.error(f"{filename} dosyası okunurken hata oluştu", e)
-                    logger.error(f"Traceback: {traceback.format_exc()}")
-                    continue
+        def read(filename):
+            file_path = os.path.join(directory_path, filename)
+            logger.debug("İşleniyor: %s", filename)
+            if how == "list":
+                return read_bin_file(file_path)
+            return read_bin_records(file_path, mmap=(how == "mmap"))
+
+        # Dosyalar thread havuzunda önceden okunur, sonuçlar dizin sırasıyla gelir
+        results = {}
+        filenames = [filename for filename in os.listdir(directory_path) if filename.endswith('.bin')]
+        for filename, result, error in prefetch(read, filenames):
+            if error is not None:
+                logger.error(f"{filename} dosyası okunurken hata oluştu", error)
+                logger.error(f"Traceback: {''.join(traceback.format_exception(type(error), error, error.__traceback__))}")
+                continue
+            results[filename] = result
+            logger.info("%s başarıyla okundu", filename)
         
-        if not dataframes:
+        if not results:
             error_msg = "Hiçbir binary dosya okunamadı"
             logger.error(error_msg)
             raise ValueError(error_msg)
             
-        logger.info(f"Toplam {len(dataframes)} dosya başarıyla okundu")
-        return dataframes
+        logger.info(f"Toplam {len(results)} dosya başarıyla okundu")
+        if how == "list":
+            return list(results.values())
+        if how == "mmap":
+            return results
+
+        # Tüm kayıtlar tek kopyayla birleştirilir; dosya adı kategorik sütunda tutulur
+        records = np.concatenate(list(results.values()))
+        names = pd.Categorical.from_codes(
+            np.repeat(np.arange(len(results)), [len(r) for r in results.values()]),
+            categories=list(results)
+        )
+        return pd.DataFrame({'file': names, 'time': records['time'], 'value': records['value']})
         
     except Exception as e:
         logger.error("Çoklu binary dosya okuma işlemi sırasında hata oluştu", e)
         logger.error(f"Traceback: {traceback.format_exc()}")
-        raise
\ No newline at end of file
+        raise
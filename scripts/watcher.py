@@ -0,0 +1,260 @@
+import os
+import time
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from scripts.logger import Logger
+from scripts.read_bin import parse_cycle_file_name, CYCLE_CHANNELS
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog kurulu değilse klasörler periyodik olarak taranır
+    Observer = None
+    FileSystemEventHandler = object
+
+# Logger'ı başlat
+logger = Logger()
+
+class _EventHandler(FileSystemEventHandler):
+    """watchdog (inotify) olaylarındaki .bin dosya yollarını kuyruğa aktarır"""
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        path = getattr(event, 'dest_path', None) or event.src_path
+        if path.endswith(".bin"):
+            self.paths.put(path)
+
+class CycleWatcher:
+    """
+    {path}/{station_id}/{date}/ altındaki yeni cycle dosyalarını izler
+
+    Dosya adları data_extraction ile aynı şekilde çözülür ve cycle'lar
+    gruplanır. Bir cycle'ın tüm kanal dosyaları mevcut olduğunda ve dosya
+    boyutları settle_time boyunca değişmediğinde (yazma bitti) cycle hazır
+    sayılır. Hazır cycle'lar station-gün bazında on_cycles(station_id, date,
+    cycle_files) ile bildirilir; cycle_files: {cycle id: {kanal: dosya yolu}}.
+    on_cycles hata verirse cycle'lar bekleyenlerde kalır ve retry_delay'den
+    başlayıp her denemede iki katına çıkan aralıklarla en fazla max_retries
+    kez yeniden denenir; sonra bırakılır (toplu çalıştırma bunları işler).
+    watchdog kuruluysa inotify olayları, değilse bugünün ve son days_back
+    günün klasörlerinin periyodik taraması kullanılır.
+    """
+
+    def __init__(self, base_path, station_ids, on_cycles, poll_interval=2.0, settle_time=1.0,
+                 required_channels=CYCLE_CHANNELS, days_back=1, use_inotify=True,
+                 max_retries=3, retry_delay=5.0):
+        self.base_path = base_path
+        self.station_ids = {str(station_id) for station_id in station_ids}
+        self.on_cycles = on_cycles
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.required_channels = list(required_channels)
+        self.days_back = days_back
+        self.use_inotify = use_inotify and Observer is not None
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        # (station_id, date, cycle_id) -> {kanal: dosya yolu}
+        self._cycles = defaultdict(dict)
+        # dosya yolu -> (boyut, mtime_ns, değişmeden beri geçen sürenin başlangıcı)
+        self._stats = {}
+        # İşlenmiş cycle -> dosya imzası (dosyalar değişirse cycle yeniden işlenir)
+        self._done = {}
+        # Yeni dosya/olay gelen ve henüz işlenmemiş cycle'lar
+        self._pending = set()
+        # İşlenirken hata veren cycle -> (deneme sayısı, sonraki denemenin zamanı)
+        self._failures = {}
+        self._paths = queue.Queue()
+        self._observer = None
+        self._last_watched = None
+
+    def _watched_dates(self):
+        today = datetime.now()
+        return {(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(self.days_back + 1)}
+
+    def _scan(self):
+        """İzlenen station-gün klasörlerini tarar"""
+        for station_id in self.station_ids:
+            for date in self._watched_dates():
+                day_folder_path = os.path.join(self.base_path, station_id, date)
+                if not os.path.isdir(day_folder_path):
+                    continue
+                for root, dirs, files in os.walk(day_folder_path):
+                    for file_name in files:
+                        if file_name.endswith(".bin"):
+                            self._observe(station_id, date, os.path.join(root, file_name))
+
+    def _observe_path(self, file_path):
+        """Olaydan gelen yolu station/tarih bilgisine çözer"""
+        parts = os.path.relpath(file_path, self.base_path).split(os.sep)
+        if len(parts) < 3 or parts[0] not in self.station_ids or parts[1] not in self._watched_dates():
+            return
+        if not os.path.exists(file_path):
+            # Silme (veya yerinden taşıma) olayı
+            self._forget_file(parts[0], parts[1], file_path)
+            return
+        self._observe(parts[0], parts[1], file_path, changed=True)
+
+    def _forget_file(self, station_id, date, file_path):
+        """Silinen dosyayı cycle'ından çıkarır; dosyası kalmayan cycle bekleyenlerden de çıkar"""
+        try:
+            cycle_id, column_name = parse_cycle_file_name(os.path.basename(file_path))
+        except (IndexError, ValueError):
+            return
+        key = (station_id, date, cycle_id)
+        channels = self._cycles.get(key)
+        self._stats.pop(file_path, None)
+        if channels is None or channels.get(column_name) != file_path:
+            return
+        del channels[column_name]
+        if not channels:
+            del self._cycles[key]
+            self._pending.discard(key)
+
+    def _observe(self, station_id, date, file_path, changed=False):
+        """Dosyayı cycle'ına ekler; yeni dosya veya değişiklik olayı ise cycle'ı bekleyenlere alır"""
+        try:
+            cycle_id, column_name = parse_cycle_file_name(os.path.basename(file_path))
+        except (IndexError, ValueError):
+            return
+        key = (station_id, date, cycle_id)
+        channels = self._cycles[key]
+        if changed or channels.get(column_name) != file_path:
+            channels[column_name] = file_path
+            self._pending.add(key)
+
+    def _is_settled(self, file_path, now):
+        """Dosya boyutu/mtime'ı settle_time boyunca değişmediyse True, dosya yoksa None döndürür"""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            self._stats.pop(file_path, None)
+            return None
+        previous = self._stats.get(file_path)
+        if previous is None or previous[:2] != (stat.st_size, stat.st_mtime_ns):
+            self._stats[file_path] = (stat.st_size, stat.st_mtime_ns, now)
+            return False
+        return now - previous[2] >= self.settle_time
+
+    def _ready_cycles(self, now):
+        """Tüm kanalları yazılmış ve henüz işlenmemiş cycle'ları station-gün bazında döndürür"""
+        ready = defaultdict(list)
+        unchanged = []
+        for key in self._pending:
+            channels = self._cycles[key]
+            if not all(c in channels for c in self.required_channels):
+                continue
+            # Tüm dosyalar her turda stat edilir ki bekleme süreleri birlikte işlesin
+            settled = {column_name: self._is_settled(path, now) for column_name, path in channels.items()}
+            missing = [column_name for column_name, state in settled.items() if state is None]
+            if missing:
+                # Silinen dosyalar cycle'dan çıkarılır; kanalı eksik cycle yeni dosya gelene kadar beklemez
+                for column_name in missing:
+                    del channels[column_name]
+                unchanged.append(key)
+                continue
+            if not all(settled.values()):
+                continue
+            signature = tuple(sorted((path, self._stats[path][:2]) for path in channels.values()))
+            if self._done.get(key) == signature:
+                unchanged.append(key)
+                continue
+            if key in self._failures and self._failures[key][1] > now:
+                continue
+            ready[key[:2]].append((key, signature))
+        self._pending.difference_update(unchanged)
+        return ready
+
+    def _forget_old_dates(self):
+        """İzleme penceresi dışına çıkan günlerin kayıtlarını bellekten siler"""
+        watched = self._watched_dates()
+        if watched == self._last_watched:
+            return
+        self._last_watched = watched
+        for store in (self._cycles, self._done, self._failures):
+            for key in [key for key in store if key[1] not in watched]:
+                del store[key]
+        self._pending = {key for key in self._pending if key[1] in watched}
+        live = {path for channels in self._cycles.values() for path in channels.values()}
+        for path in [path for path in self._stats if path not in live]:
+            del self._stats[path]
+
+    def poll_once(self):
+        """Yeni dosyaları toplar ve hazır cycle'ları bildirir; bildirilen cycle sayısını döndürür"""
+        if self._observer is None:
+            self._scan()
+        else:
+            while True:
+                try:
+                    self._observe_path(self._paths.get_nowait())
+                except queue.Empty:
+                    break
+
+        notified = 0
+        now = time.monotonic()
+        for (station_id, date), items in self._ready_cycles(now).items():
+            cycle_files = {key[2]: dict(self._cycles[key]) for key, _ in sorted(items)}
+            try:
+                self.on_cycles(station_id, date, cycle_files)
+            except Exception as e:
+                logger.error(f"{station_id}_{date} için {len(cycle_files)} cycle işlenirken hata oluştu", e)
+                self._retry_later(items, now)
+                continue
+            for key, signature in items:
+                self._done[key] = signature
+                self._failures.pop(key, None)
+                self._pending.discard(key)
+            notified += len(cycle_files)
+
+        self._forget_old_dates()
+        return notified
+
+    def _retry_later(self, items, now):
+        """Hata veren cycle'ları bekleyenlerde tutar; deneme sınırı aşılanları bırakır"""
+        for key, signature in items:
+            attempts = self._failures.get(key, (0, None))[0] + 1
+            if attempts > self.max_retries:
+                # Dosyaları değişmedikçe yeniden denenmez; toplu çalıştırma (parmak izi) bunları yakalar
+                logger.warning("%s cycle'ı %s denemeden sonra bırakıldı", "_".join(key), attempts)
+                self._done[key] = signature
+                self._failures.pop(key, None)
+                self._pending.discard(key)
+            else:
+                self._failures[key] = (attempts, now + self.retry_delay * 2 ** (attempts - 1))
+
+    def start(self):
+        """inotify gözlemcisini (varsa) başlatır ve mevcut dosyaları bir kez tarar"""
+        if self.use_inotify:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self._paths), self.base_path, recursive=True)
+            self._observer.start()
+            logger.info(f"{self.base_path} inotify ile izleniyor")
+        else:
+            logger.info(f"{self.base_path} {self.poll_interval} saniyede bir taranıyor (watchdog yok)")
+        self._scan()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def run(self, stop_event: threading.Event = None):
+        """stop_event set edilene (veya Ctrl+C) kadar izlemeye devam eder"""
+        stop_event = stop_event or threading.Event()
+        self.start()
+        try:
+            while not stop_event.is_set():
+                self.poll_once()
+                stop_event.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("İzleme durduruldu")
+        finally:
+            self.stop()
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# Logger çalışma dizinine logs/ klasörü açar; testlerin logları depoya yazılmasın
+os.chdir(tempfile.mkdtemp(prefix="tubitak_tests_"))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.batching import AdaptiveBatcher, batch_params, param_limited_batches
+
+def feature_rows(cycles, features):
+    """Her cycle için tüm feature'ları içeren satırlar (insert_feature_values girdisi gibi)"""
+    return pd.DataFrame({
+        'CYCLE_ID': np.repeat(np.arange(cycles), features),
+        'FEATURE_ID': np.tile(np.arange(features), cycles),
+        'VALUE': np.arange(cycles * features, dtype=float),
+    })
+
+@pytest.mark.parametrize("batch_size,max_params", [(1000, 50), (7, 2000), (200, 25), (5000, 3)])
+def test_slices_respect_max_params_and_cover_rows(batch_size, max_params):
+    data = feature_rows(60, 20)
+    slices = list(param_limited_batches(data, batch_size, max_params))
+
+    for part in slices:
+        assert len(part) <= batch_size
+        assert batch_params(part['CYCLE_ID'], part['FEATURE_ID']) <= max_params
+    # Tüm satırlar sırasıyla ve bir kez
+    pd.testing.assert_frame_equal(pd.concat(slices), data)
+
+def test_callable_batch_size_is_read_per_slice():
+    sizes = iter([10, 3, 100])
+    slices = list(param_limited_batches(feature_rows(5, 5), lambda: next(sizes), 2000))
+    assert [len(part) for part in slices] == [10, 3, 12]
+
+def test_record_grows_after_sample_window():
+    batcher = AdaptiveBatcher(initial_size=1000, target_seconds=1.0)
+    for _ in range(AdaptiveBatcher.SAMPLE_BATCHES - 1):
+        batcher.record(1000, 0.1)
+    assert batcher.size == 1000
+    batcher.record(1000, 0.1)
+    assert batcher.size == int(1000 * AdaptiveBatcher.GROWTH)
+
+def test_record_reverts_growth_that_missed_target():
+    batcher = AdaptiveBatcher(initial_size=1000, target_seconds=1.0)
+    for _ in range(AdaptiveBatcher.SAMPLE_BATCHES):
+        batcher.record(1000, 0.5)
+    assert batcher.size == 1250
+    batcher.record(1250, 2.0)
+    assert batcher.size == 1000
+
+def test_slow_batch_shrinks_size():
+    batcher = AdaptiveBatcher(initial_size=1000, min_size=100, target_seconds=1.0)
+    batcher.record(1000, 1.6)
+    assert batcher.size == int(1000 / 1.6)
+    # En fazla yarıya iner ve min_size altına düşmez
+    batcher.record(625, 100.0)
+    assert batcher.size == 312
+    for _ in range(5):
+        batcher.record(100, 100.0)
+    assert batcher.size == 100
+
+def test_record_error_halves_size_and_lowers_param_limit():
+    batcher = AdaptiveBatcher(initial_size=1000, max_params=2000)
+    batcher.record_error(RuntimeError("timeout"))
+    assert (batcher.size, batcher.max_params) == (500, 2000)
+    batcher.record_error(RuntimeError("The incoming request has too many parameters. The server supports a maximum of 2100 parameters."))
+    assert (batcher.size, batcher.max_params) == (250, 1500)
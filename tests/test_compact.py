@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pytest
+
+import scripts.read_bin
+
+from scripts.read_bin import compact_day, data_extraction
+from scripts.cycle_pack import PACK_FILE_NAME, CyclePack, write_pack
+from scripts.cycle_batch import CycleBatch
+
+DATE = "2025-01-16"
+STATION = "1"
+
+def write_cycle(day_folder, cycle_id, channel, values):
+    path = os.path.join(day_folder, f"X_{cycle_id} {DATE} 10-00-00_{channel}.bin")
+    np.asarray(values, dtype=np.float32).tofile(path)
+    return path
+
+@pytest.fixture
+def day_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv("path", str(tmp_path))
+    folder = tmp_path / STATION / DATE
+    folder.mkdir(parents=True)
+    return str(folder)
+
+def test_pack_round_trip(tmp_path):
+    batch = CycleBatch.from_dict({
+        "1": {"Pressure1": np.arange(5, dtype=np.float32), "Temp1": np.arange(3, dtype=np.float32)},
+        "2": {"Pressure1": np.arange(7, dtype=np.float32) * 2},
+    })
+    files = {"a.bin": [20, 1], "b.bin": [12, 2]}
+    for compression in ("none", "zlib"):
+        path = str(tmp_path / f"{compression}.pack")
+        write_pack(path, batch, files, compression=compression, chunk_cycles=1)
+        pack = CyclePack(path)
+        assert pack.cycle_ids == ["1", "2"]
+        assert pack.files == files
+        assert pack.has("1", "Temp1") and not pack.has("2", "Temp1")
+        np.testing.assert_array_equal(pack.get("2", "Pressure1"), np.arange(7, dtype=np.float32) * 2)
+        written = pack.read()
+        assert written.columns == batch.columns
+        for column_name in batch.columns:
+            # (values, offsets, present)
+            for written_array, array in zip(written.channels[column_name], batch.channels[column_name]):
+                np.testing.assert_array_equal(written_array, array)
+
+def test_compact_day_matches_loose_files(day_folder):
+    write_cycle(day_folder, 1, "Pressure1", [1, 2, 3])
+    write_cycle(day_folder, 1, "Temp1", [4, 5])
+    write_cycle(day_folder, 2, "Pressure1", [6])
+    before = data_extraction(DATE, STATION)
+
+    assert compact_day(DATE, STATION, remove_sources=True) == 2
+    assert os.listdir(day_folder) == [PACK_FILE_NAME]
+    after = data_extraction(DATE, STATION)
+    assert before.sort_index().equals(after.sort_index())
+
+    # Yeni dosya yoksa pack yeniden yazılmaz
+    assert compact_day(DATE, STATION) == 0
+
+def test_compact_day_keeps_unreadable_files(day_folder):
+    good = write_cycle(day_folder, 1, "Pressure1", [1, 2, 3])
+    bad = os.path.join(day_folder, f"C_3 {DATE} 10-00-00_Pressure1.bin")
+    with open(bad, "wb") as f:
+        f.write(b"\0" * 41)
+    unnamed = os.path.join(day_folder, "bozuk.bin")
+    with open(unnamed, "wb") as f:
+        f.write(b"\0" * 8)
+
+    assert compact_day(DATE, STATION, remove_sources=True) == 1
+    assert not os.path.exists(good)
+    assert os.path.exists(bad)
+    assert os.path.exists(unnamed)
+    pack = CyclePack(os.path.join(day_folder, PACK_FILE_NAME))
+    assert list(pack.files) == [os.path.basename(good)]
+
+    # Okunamayan dosyalar tekrar denenir fakat yine silinmez
+    assert compact_day(DATE, STATION, remove_sources=True) == 0
+    assert os.path.exists(bad)
+
+def test_compact_day_rejects_pack_missing_a_channel(day_folder, monkeypatch):
+    paths = [write_cycle(day_folder, 1, "Pressure1", [1, 2, 3]), write_cycle(day_folder, 1, "Temp1", [4, 5])]
+
+    def write_without_temp(path, batch, files, compression="none"):
+        channels = {name: arrays for name, arrays in batch.channels.items() if name != "Temp1"}
+        write_pack(path, CycleBatch(batch.cycle_ids, channels), files, compression=compression)
+
+    monkeypatch.setattr(scripts.read_bin, "write_pack", write_without_temp)
+    with pytest.raises(ValueError, match="Pack doğrulanamadı"):
+        compact_day(DATE, STATION, remove_sources=True)
+    assert all(os.path.exists(path) for path in paths)
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import numpy as np
+import pytest
+
+from scripts.fingerprint import FingerprintStore, without_cycles
+from scripts.read_bin import CYCLE_CHANNELS, iter_cycle_batches
+
+DATE = "2025-01-16"
+STATION = "1"
+
+@pytest.fixture
+def day_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv("path", str(tmp_path))
+    folder = tmp_path / STATION / DATE
+    folder.mkdir(parents=True)
+    for cycle_id in (1, 2):
+        np.arange(4, dtype=np.float32).tofile(str(folder / f"X_{cycle_id} {DATE} 10-00-00_Pressure1.bin"))
+    return folder
+
+def test_unchanged_day_is_skipped(day_folder, tmp_path):
+    store = FingerprintStore(str(tmp_path / "fp.db"), extractor_version="1", feature_groups=["pressure", "temp"])
+    plan = store.plan(STATION, DATE)
+    assert plan.action == "full"
+    store.commit(plan)
+    assert store.plan(STATION, DATE).action == "skip"
+
+def test_feature_group_change_forces_full(day_folder, tmp_path):
+    db_path = str(tmp_path / "fp.db")
+    store = FingerprintStore(db_path, extractor_version="1", feature_groups=["temp", "pressure"])
+    store.commit(store.plan(STATION, DATE))
+    store.close()
+
+    # Sıra önemli değil
+    assert FingerprintStore(db_path, extractor_version="1", feature_groups=["pressure", "temp"]).plan(STATION, DATE).action == "skip"
+    assert FingerprintStore(db_path, extractor_version="1", feature_groups=["pressure", "temp", "other"]).plan(STATION, DATE).action == "full"
+
+def test_legacy_rows_use_default_groups(day_folder, tmp_path):
+    db_path = str(tmp_path / "fp.db")
+    store = FingerprintStore(db_path, extractor_version="1", feature_groups=["pressure", "temp"])
+    store.commit(store.plan(STATION, DATE))
+    store.close()
+    # Gruplar saklanmadan önce yazılmış kayıt
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE DAY_FINGERPRINTS SET FEATURE_GROUPS = NULL")
+    conn.commit()
+    conn.close()
+
+    assert FingerprintStore(db_path, extractor_version="1", feature_groups=["pressure", "temp"]).plan(STATION, DATE).action == "skip"
+    assert FingerprintStore(db_path, extractor_version="1", feature_groups=["other", "pressure", "temp"]).plan(STATION, DATE).action == "full"
+
+def test_incomplete_cycles_are_planned_again(day_folder, tmp_path):
+    for channel in CYCLE_CHANNELS:
+        np.arange(4, dtype=np.float32).tofile(str(day_folder / f"X_3 {DATE} 10-00-00_{channel}.bin"))
+    store = FingerprintStore(str(tmp_path / "fp.db"), extractor_version="1", feature_groups=["pressure", "temp"])
+    plan = store.plan(STATION, DATE)
+
+    batches, skipped = iter_cycle_batches(DATE, STATION, chunk_size=10)
+    assert [list(batch.cycle_ids) for batch in batches] == [["3"]]
+    assert skipped == {"1", "2"}
+
+    store.commit(without_cycles(plan, skipped))
+    plan = store.plan(STATION, DATE)
+    assert plan.action == "incremental"
+    assert plan.cycle_ids == {"1", "2"}
@@ -0,0 +1,102 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from dotenv import load_dotenv
+
+# pyodbc veya ODBC sürücü yöneticisi (libodbc) kurulu değilse atlanır
+pyodbc = pytest.importorskip("pyodbc", exc_type=ImportError)
+
+# db_functions import sırasında EXTRACTOR_VERSION ister
+os.environ.setdefault("EXTRACTOR_VERSION", "test")
+from scripts.db_connection import Session, execute_query
+from scripts.db_functions import _STAGE_INPUT_SIZES, insert_feature_values, merge_feature_values
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FakeCursor:
+    def __init__(self):
+        self.calls = []
+
+    def setinputsizes(self, sizes):
+        self.calls.append(("setinputsizes", sizes))
+
+    def executemany(self, query, rows):
+        self.calls.append(("executemany", query, rows, self.fast_executemany))
+
+    def close(self):
+        self.calls.append(("close",))
+
+class FakeConnection:
+    """SQLAlchemy Connection yerine; .connection.cursor() ile DBAPI cursor'ı verir"""
+
+    def __init__(self):
+        self.cursor_ = FakeCursor()
+        self.connection = self
+
+    def cursor(self):
+        return self.cursor_
+
+    def execute(self, *args):
+        raise AssertionError("Tipli yükleme SQLAlchemy üzerinden gitmemeli")
+
+def test_staging_insert_declares_parameter_types():
+    conn = FakeConnection()
+    Session(conn, False).bulk_insert("#EXTRACTED_FEATURES_STAGE", {
+        'CYCLE_ID': np.array([1, 2]),
+        'FEATURE_ID': np.array([3, 4]),
+        'FEATURE_VALUE': np.array([0.5, np.nan]),
+    }, input_sizes=_STAGE_INPUT_SIZES)
+
+    assert conn.cursor_.calls == [
+        ("setinputsizes", _STAGE_INPUT_SIZES),
+        ("executemany", "INSERT INTO #EXTRACTED_FEATURES_STAGE (CYCLE_ID, FEATURE_ID, FEATURE_VALUE) VALUES (?, ?, ?)",
+         [(1, 3, 0.5), (2, 4, None)], True),
+        ("close",),
+    ]
+
+# Gerçek SQL Server testi: db.config'teki sunucuda, yalnızca bu station id'nin kayıtları yazılır ve silinir
+load_dotenv(os.path.join(REPO_ROOT, "db.config"))
+MSSQL_TEST_STATION_ID = os.getenv("MSSQL_TEST_STATION_ID")
+
+def _station_rows(station_id):
+    rows = execute_query(
+        "SELECT CYCLE_ID, FEATURE_ID, FEATURE_VALUE, EXTRACTOR_VERSION FROM EXTRACTED_FEATURES WHERE STATION_ID = ? ORDER BY CYCLE_ID, FEATURE_ID",
+        (station_id,), fetch=True
+    )
+    return rows.reset_index(drop=True)
+
+def _delete_station_rows(station_id):
+    execute_query("DELETE FROM EXTRACTED_FEATURES WHERE STATION_ID = ?", (station_id,))
+
+@pytest.mark.skipif(not MSSQL_TEST_STATION_ID, reason="MSSQL_TEST_STATION_ID tanımlı değil (SQL Server gerekir)")
+def test_merge_matches_batch_upsert(monkeypatch):
+    monkeypatch.setenv("IS_TEST", "false")
+    station_id = int(MSSQL_TEST_STATION_ID)
+    feature_ids = execute_query("SELECT TOP 3 FEATURE_ID FROM FEATURES_LOOKUP ORDER BY FEATURE_ID", fetch=True)['FEATURE_ID'].tolist()
+    assert feature_ids, "FEATURES_LOOKUP boş"
+
+    cycles = np.arange(1, 51)
+    first = pd.DataFrame({
+        'CYCLE_ID': np.repeat(cycles, len(feature_ids)),
+        'FEATURE_ID': np.tile(feature_ids, len(cycles)),
+    })
+    first['FEATURE_VALUE'] = np.arange(len(first), dtype=float) / 7
+    # İkinci yazma: değişen, NULL olan ve yeni eklenen değerler
+    second = pd.concat([first.iloc[::2], first.iloc[:5].assign(CYCLE_ID=lambda d: d['CYCLE_ID'] + 1000)], ignore_index=True)
+    second.loc[::3, 'FEATURE_VALUE'] += 1
+    second.loc[::5, 'FEATURE_VALUE'] = np.nan
+
+    results = {}
+    try:
+        for name, write in (("batch", insert_feature_values), ("merge", merge_feature_values)):
+            _delete_station_rows(station_id)
+            write(first, station_id)
+            after_first = _station_rows(station_id)
+            write(second, station_id)
+            results[name] = (after_first, _station_rows(station_id))
+    finally:
+        _delete_station_rows(station_id)
+
+    for batch_rows, merge_rows in zip(results["batch"], results["merge"]):
+        pd.testing.assert_frame_equal(merge_rows, batch_rows)
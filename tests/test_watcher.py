@@ -0,0 +1,90 @@
+import os
+from datetime import datetime
+import numpy as np
+import pytest
+
+from scripts.read_bin import CYCLE_CHANNELS
+from scripts.watcher import CycleWatcher
+from scripts.fingerprint import FingerprintStore, stat_files
+
+STATION = "1"
+
+@pytest.fixture
+def day_folder(tmp_path):
+    date = datetime.now().strftime("%Y-%m-%d")
+    folder = tmp_path / STATION / date
+    folder.mkdir(parents=True)
+    for channel in CYCLE_CHANNELS:
+        np.arange(4, dtype=np.float32).tofile(str(folder / f"X_1 {date} 10-00-00_{channel}.bin"))
+    return folder
+
+def make_watcher(tmp_path, on_cycles, **kwargs):
+    return CycleWatcher(str(tmp_path), [STATION], on_cycles, settle_time=0, use_inotify=False, days_back=0, **kwargs)
+
+def test_failed_cycles_are_retried(day_folder, tmp_path):
+    calls = []
+
+    def on_cycles(station_id, date, cycle_files):
+        calls.append(list(cycle_files))
+        if len(calls) == 1:
+            raise RuntimeError("veritabanı kapalı")
+
+    watcher = make_watcher(tmp_path, on_cycles, retry_delay=0)
+    watcher.poll_once()  # dosya boyutları ilk kez görülür
+    assert watcher.poll_once() == 0
+    assert watcher.poll_once() == 1
+    assert watcher.poll_once() == 0
+    assert calls == [["1"], ["1"]]
+
+def test_retries_wait_and_stop_at_limit(day_folder, tmp_path):
+    calls = []
+
+    def on_cycles(station_id, date, cycle_files):
+        calls.append(list(cycle_files))
+        raise RuntimeError("veritabanı kapalı")
+
+    watcher = make_watcher(tmp_path, on_cycles, retry_delay=3600)
+    watcher.poll_once()
+    watcher.poll_once()
+    watcher.poll_once()
+    # Bekleme süresi dolmadan yeniden denenmez
+    assert len(calls) == 1
+
+    watcher = make_watcher(tmp_path, on_cycles, retry_delay=0, max_retries=2)
+    calls.clear()
+    for _ in range(6):
+        watcher.poll_once()
+    assert len(calls) == 3
+
+def test_watched_files_are_added_to_fingerprint(day_folder, tmp_path, monkeypatch):
+    monkeypatch.setenv("path", str(tmp_path))
+    date = day_folder.name
+    store = FingerprintStore(str(tmp_path / "fp.db"), extractor_version="1", feature_groups=["pressure", "temp"])
+    store.add_files(STATION, date, stat_files(str(day_folder), [str(path) for path in day_folder.iterdir()]))
+    assert store.plan(STATION, date).action == "skip"
+
+    np.arange(4, dtype=np.float32).tofile(str(day_folder / f"X_2 {date} 10-00-00_Pressure1.bin"))
+    plan = store.plan(STATION, date)
+    assert plan.action == "incremental"
+    assert plan.cycle_ids == {"2"}
+
+def test_deleted_files_and_old_dates_are_not_pending(day_folder, tmp_path):
+    watcher = make_watcher(tmp_path, lambda *args: None)
+    watcher._observer = object()  # olaylar kuyruktan okunur (inotify gibi)
+    old_folder = tmp_path / STATION / "2000-01-01"
+    old_folder.mkdir()
+    watcher._paths.put(str(old_folder / "X_9 2000-01-01 10-00-00_Pressure1.bin"))
+    deleted = day_folder / f"X_5 {day_folder.name} 10-00-00_Pressure1.bin"
+    watcher._paths.put(str(deleted))
+    watcher.poll_once()
+    assert not watcher._pending
+
+    # Tüm kanalları görülmüş cycle'ın bir dosyası silinirse cycle kanalı eksik sayılır
+    paths = sorted(str(path) for path in day_folder.iterdir())
+    for path in paths:
+        watcher._paths.put(path)
+    watcher.poll_once()
+    os.remove(paths[0])
+    watcher.poll_once()
+    assert not watcher._pending
+    assert len(watcher._cycles[(STATION, day_folder.name, "1")]) == len(CYCLE_CHANNELS) - 1